@@ -1,10 +1,145 @@
 import streamlit as st
+import html
 import os
+import re
+import sqlite3
+import threading
+import time
+
+# SQLite database holding chat messages for every user and document, in
+# the project's temp directory whatever the working directory is
+CHAT_DB_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "temp", "chat.db"
+)
+
+# Serializes writes from concurrent sessions sharing the connection
+_CHAT_DB_LOCK = threading.Lock()
+
+CHAT_CSS = """
+<style>
+.chat-container {
+    border: 1px solid #ddd;
+    border-radius: 5px;
+    padding: 10px;
+    margin-bottom: 10px;
+    max-height: 300px;
+    overflow-y: auto;
+}
+.user-message {
+    background-color: #E8F0FE;
+    padding: 8px;
+    border-radius: 15px;
+    margin: 5px 0;
+    text-align: right;
+}
+.assistant-message {
+    background-color: #F0F0F0;
+    padding: 8px;
+    border-radius: 15px;
+    margin: 5px 0;
+    text-align: left;
+}
+</style>
+"""
+
+# Avatar shown in front of each message, by role
+ROLE_ICONS = {"user": "👤", "assistant": "🤖"}
+
+
+@st.cache_resource(show_spinner=False)
+def _chat_db():
+    """Open the shared chat database connection
+    
+    Returns:
+        A sqlite3 connection in autocommit mode with WAL journaling enabled
+    """
+    os.makedirs(os.path.dirname(CHAT_DB_PATH), exist_ok=True)
+    conn = sqlite3.connect(CHAT_DB_PATH, isolation_level=None, check_same_thread=False)
+    conn.executescript(
+        """
+        PRAGMA journal_mode=WAL;
+        PRAGMA synchronous=NORMAL;
+        PRAGMA busy_timeout=5000;
+        CREATE TABLE IF NOT EXISTS msg(owner TEXT, doc TEXT, role TEXT, content TEXT, ts REAL);
+        """
+    )
+    
+    # Databases written before histories had an owner lack the column
+    if "owner" not in {row[1] for row in conn.execute("PRAGMA table_info(msg)")}:
+        conn.execute("ALTER TABLE msg ADD COLUMN owner TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS msg_owner_doc ON msg(owner, doc, ts)")
+    return conn
+
+
+def _load_messages(owner, document_path):
+    """Load the stored chat history of one user for a document
+    
+    Args:
+        owner: User or session the history belongs to
+        document_path: Path of the document the messages belong to
+        
+    Returns:
+        List of messages (role, content) in the order they were sent
+    """
+    with _CHAT_DB_LOCK:
+        rows = _chat_db().execute(
+            "SELECT role, content FROM msg WHERE owner = ? AND doc = ? ORDER BY ts, rowid",
+            (owner, document_path)
+        ).fetchall()
+    return [{"role": role, "content": content} for role, content in rows]
+
+
+def _save_messages(owner, document_path, messages):
+    """Store several chat messages in a single transaction
+    
+    Args:
+        owner: User or session the history belongs to
+        document_path: Path of the document the messages belong to
+        messages: List of messages (role, content) to append
+    """
+    now = time.time()
+    with _CHAT_DB_LOCK:
+        conn = _chat_db()
+        conn.execute("BEGIN")
+        try:
+            conn.executemany(
+                "INSERT INTO msg(owner, doc, role, content, ts) VALUES (?, ?, ?, ?, ?)",
+                [(owner, document_path, m["role"], m["content"], now) for m in messages]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+
+def _clear_messages(owner, document_path):
+    """Delete the stored chat history of one user for a document
+    
+    Args:
+        owner: User or session the history belongs to
+        document_path: Path of the document whose messages are deleted
+    """
+    with _CHAT_DB_LOCK:
+        _chat_db().execute("DELETE FROM msg WHERE owner = ? AND doc = ?", (owner, document_path))
 
 class DocumentChat:
     """Component for chatting with the document"""
     
-    def __init__(self, document_path, json_path=None, ocr_path=None, chat_history=None):
+    # Keyword intents recognised by the stub responder, matched in one pass
+    _INTENT_RE = re.compile(
+        r"(?P<hello>\bhi\b|hello)"
+        r"|(?P<what_doc>what(?=.*document)|document(?=.*what))"
+        r"|(?P<search>search|find)"
+        r"|(?P<json>json|data)"
+        r"|(?P<ocr>ocr)"
+        r"|(?P<help>help)",
+        re.IGNORECASE | re.DOTALL
+    )
+    
+    # Order in which intents win when a message matches several
+    _INTENT_PRIORITY = ("hello", "what_doc", "search", "json", "ocr", "help")
+    
+    def __init__(self, document_path, json_path=None, ocr_path=None, chat_history=None, owner=""):
         """Initialize the document chat component
         
         Args:
@@ -12,8 +147,11 @@ class DocumentChat:
             json_path: Optional path to the JSON extraction data
             ocr_path: Optional path to the OCR data
             chat_history: List of previous chat messages
+            owner: User or session the stored history belongs to, so users
+                chatting about files with the same name don't share it
         """
         self.document_path = document_path
+        self.owner = owner
         self.json_path = json_path
         self.ocr_path = ocr_path
         self.chat_history = chat_history or []
@@ -24,50 +162,41 @@ class DocumentChat:
         Returns:
             Updated chat history
         """
-        # Chat container
-        st.markdown(
-            """
-            <style>
-            .chat-container {
-                border: 1px solid #ddd;
-                border-radius: 5px;
-                padding: 10px;
-                margin-bottom: 10px;
-                max-height: 300px;
-                overflow-y: auto;
-            }
-            .user-message {
-                background-color: #E8F0FE;
-                padding: 8px;
-                border-radius: 15px;
-                margin: 5px 0;
-                text-align: right;
-            }
-            .assistant-message {
-                background-color: #F0F0F0;
-                padding: 8px;
-                border-radius: 15px;
-                margin: 5px 0;
-                text-align: left;
-            }
-            </style>
-            """,
-            unsafe_allow_html=True
-        )
-        
-        # Display chat history
-        chat_container = st.container()
-        with chat_container:
-            st.markdown('<div class="chat-container">', unsafe_allow_html=True)
-            for message in self.chat_history:
-                role = message["role"]
-                content = message["content"]
-                
-                if role == "user":
-                    st.markdown(f'<div class="user-message">👤 {content}</div>', unsafe_allow_html=True)
-                else:
-                    st.markdown(f'<div class="assistant-message">🤖 {content}</div>', unsafe_allow_html=True)
-            st.markdown('</div>', unsafe_allow_html=True)
+        # Chat styles. Streamlit removes elements a full run doesn't re-send,
+        # so they can't be emitted once per session; outside the fragment
+        # they are sent once per full run and kept across fragment reruns
+        st.markdown(CHAT_CSS, unsafe_allow_html=True)
+        
+        # Keep the history in session state so it survives fragment reruns,
+        # loading the document's stored messages the first time it is shown;
+        # the history passed in may belong to the previously shown document
+        history_key = (self.owner, self.document_path)
+        if st.session_state.get("_chat_history_doc") != history_key:
+            st.session_state["chat_history"] = _load_messages(self.owner, self.document_path)
+            st.session_state["_chat_history_doc"] = history_key
+        
+        self._chat_fragment()
+        
+        self.chat_history = st.session_state["chat_history"]
+        return self.chat_history
+    
+    @st.fragment
+    def _chat_fragment(self):
+        """Render the chat history and input form
+        
+        Runs as a Streamlit fragment so that sending a message only reruns
+        the chat pane rather than the whole page.
+        """
+        chat_history = st.session_state["chat_history"]
+        
+        # Display chat history as a single HTML block
+        html_parts = ['<div class="chat-container">']
+        for message in chat_history:
+            role = "user" if message["role"] == "user" else "assistant"
+            content = html.escape(message["content"])
+            html_parts.append(f'<div class="{role}-message">{ROLE_ICONS[role]} {content}</div>')
+        html_parts.append('</div>')
+        st.markdown("".join(html_parts), unsafe_allow_html=True)
         
         # Chat input
         with st.form(key="chat_form", clear_on_submit=True):
@@ -75,21 +204,25 @@ class DocumentChat:
             submit_button = st.form_submit_button("Send")
             
             if submit_button and user_input:
-                # Add user message to history
-                self.chat_history.append({"role": "user", "content": user_input})
-                
                 # Process message and generate response (stub)
                 response = self._generate_response(user_input)
                 
-                # Add assistant message to history
-                self.chat_history.append({"role": "assistant", "content": response})
+                # Add both messages to history and store them together
+                new_messages = [
+                    {"role": "user", "content": user_input},
+                    {"role": "assistant", "content": response}
+                ]
+                chat_history.extend(new_messages)
+                _save_messages(self.owner, self.document_path, new_messages)
         
-        # Clear chat button
-        if st.button("Clear Chat History"):
-            self.chat_history = []
-            st.experimental_rerun()
-        
-        return self.chat_history
+        # Clear chat button; the callback runs before the fragment reruns,
+        # so the emptied history is shown without a full page rerun
+        st.button("Clear Chat History", on_click=self._clear_history)
+    
+    def _clear_history(self):
+        """Delete the stored chat history and reset it in session state"""
+        _clear_messages(self.owner, self.document_path)
+        st.session_state["chat_history"] = []
     
     def _generate_response(self, user_input):
         """Generate a response to the user's input (stub implementation)
@@ -105,25 +238,28 @@ class DocumentChat:
         
         document_name = os.path.basename(self.document_path)
         
-        if "hello" in user_input.lower() or "hi" in user_input.lower():
+        matched = {m.lastgroup for m in self._INTENT_RE.finditer(user_input)}
+        intent = next((name for name in self._INTENT_PRIORITY if name in matched), None)
+        
+        if intent == "hello":
             return f"Hello! I'm here to help you with document '{document_name}'. What would you like to know?"
         
-        elif "what" in user_input.lower() and "document" in user_input.lower():
+        elif intent == "what_doc":
             return f"This is document '{document_name}'. I can help you understand its contents or answer questions about it."
         
-        elif "search" in user_input.lower() or "find" in user_input.lower():
+        elif intent == "search":
             return "You can use the search tool above to find specific information in the document."
         
-        elif "json" in user_input.lower() or "data" in user_input.lower():
+        elif intent == "json":
             return "The extracted JSON data is displayed in the editor panel. You can modify values there if needed."
         
-        elif "ocr" in user_input.lower():
+        elif intent == "ocr":
             if self.ocr_path:
                 return "OCR data is available for this document. You can see the text extraction with bounding boxes in the OCR visualization panel."
             else:
                 return "No OCR data has been provided for this document."
         
-        elif "help" in user_input.lower():
+        elif intent == "help":
             return "I can help you understand the document, find information, or explain the extracted data. You can also use the search tool to locate specific content."
         
         else:
@@ -1,22 +1,132 @@
 import os
 import streamlit as st
 import base64
-from PIL import Image
-import xml.dom.minidom
+import glob
+import hashlib
+import mmap
+import shutil
+from lxml import etree
 from utils.file_handling import load_file
 
+# Streamlit serves this directory (next to main.py) at app/static when
+# server.enableStaticServing is set
+STATIC_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "static")
+STATIC_URL = "app/static"
+
+# XML documents larger than this are previewed instead of shown in full
+LARGE_XML_BYTES = 10 * 1024 * 1024
+XML_PREVIEW_LINES = 2000
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _file_bytes(path, version):
+    """Read a document's raw bytes, cached across reruns
+    
+    Args:
+        path: Path to the document file
+        version: Identity of the file's current content, used to invalidate the cache
+        
+    Returns:
+        The file content as bytes
+    """
+    with open(path, "rb") as f:
+        return f.read()
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _pdf_b64(path, version):
+    """Base64-encode a PDF for inline display, cached across reruns
+    
+    Args:
+        path: Path to the PDF file
+        version: Identity of the file's current content, used to invalidate the cache
+        
+    Returns:
+        The base64-encoded file content as a string
+    """
+    # Encode straight from a memory map rather than reading a copy first
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return base64.b64encode(mm).decode('ascii')
+
+
+@st.cache_resource(max_entries=16, show_spinner=False)
+def _publish_pdf(path, version):
+    """Copy a PDF into the static directory so the browser can fetch it by URL
+    
+    Args:
+        path: Path to the PDF file
+        version: Identity of the file's current content, used to invalidate the cache
+        
+    Returns:
+        URL of the published PDF, relative to the app root
+    """
+    # Name copies by source and version so older versions of the same
+    # source can be found and removed
+    source = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()
+    version = hashlib.sha1(str(version).encode('utf-8')).hexdigest()[:12]
+    filename = f"{source}-{version}.pdf"
+    target = os.path.join(STATIC_DIR, filename)
+    
+    if not os.path.exists(target):
+        os.makedirs(STATIC_DIR, exist_ok=True)
+        shutil.copyfile(path, target)
+    
+    # Keep only the current copy of each source
+    for stale in glob.glob(os.path.join(STATIC_DIR, f"{source}-*.pdf")):
+        if stale != target:
+            try:
+                os.remove(stale)
+            except OSError:
+                pass
+    
+    return f"{STATIC_URL}/{filename}"
+
+
+@st.cache_data(max_entries=4, show_spinner=False)
+def _pretty_xml(path, version):
+    """Parse and pretty-print an XML document, cached across reruns
+    
+    Args:
+        path: Path to the XML file
+        version: Identity of the file's current content, used to invalidate the cache
+        
+    Returns:
+        The pretty-printed XML as a string
+    """
+    # Uploaded XML is untrusted, so external entities are never resolved
+    parser = etree.XMLParser(remove_blank_text=True, resolve_entities=False, no_network=True)
+    tree = etree.parse(path, parser)
+    
+    # Keep the XML declaration, which unicode serialization leaves out
+    declaration = f'<?xml version="{tree.docinfo.xml_version or "1.0"}" ?>\n'
+    return declaration + etree.tostring(tree, pretty_print=True, encoding="unicode")
+
+
 class DocumentViewer:
     """Document viewer component for PDF, images, and XML files"""
     
-    def __init__(self, document_path):
+    def __init__(self, document_path, document_version=None):
         """Initialize the document viewer
         
         Args:
             document_path: Path to the document file
+            document_version: Identity of the upload saved at document_path
+                (e.g. its file_id), used as the cache key instead of the
+                file's modification time
         """
         self.document_path = document_path
+        self.document_version = document_version
         self.file_extension = os.path.splitext(document_path)[1].lower()
     
+    def _version(self):
+        """Get the cache key for the document's current content"""
+        if self.document_version is not None:
+            return self.document_version
+        return os.path.getmtime(self.document_path)
+    
     def render(self):
         """Render the document viewer in the Streamlit UI"""
         if not os.path.exists(self.document_path):
@@ -35,35 +145,40 @@ class DocumentViewer:
     
     def _render_pdf(self):
         """Render a PDF document"""
-        # Display PDF using an iframe and base64 encoding
-        with open(self.document_path, "rb") as f:
-            base64_pdf = base64.b64encode(f.read()).decode('utf-8')
+        version = self._version()
+        
+        # Serve the PDF as a static file so it doesn't go through the websocket;
+        # fall back to inline base64 when static serving is disabled
+        if st.get_option("server.enableStaticServing"):
+            pdf_src = _publish_pdf(self.document_path, version)
+        else:
+            pdf_src = f"data:application/pdf;base64,{_pdf_b64(self.document_path, version)}"
         
         # Create a resizable container with the PDF
         pdf_height = st.slider("PDF Viewer Height", 400, 1000, 600, key="pdf_height_slider")
-        pdf_display = f'<iframe src="data:application/pdf;base64,{base64_pdf}" width="100%" height="{pdf_height}" type="application/pdf"></iframe>'
+        pdf_display = f'<iframe src="{pdf_src}" width="100%" height="{pdf_height}" type="application/pdf"></iframe>'
         st.markdown(pdf_display, unsafe_allow_html=True)
         
         # Add download button
         st.download_button(
             label="Download PDF",
-            data=open(self.document_path, "rb"),
+            data=_file_bytes(self.document_path, version),
             file_name=os.path.basename(self.document_path),
             mime="application/pdf"
         )
     
     def _render_image(self):
         """Render an image document"""
-        image = Image.open(self.document_path)
+        image_bytes = _file_bytes(self.document_path, self._version())
         
         # Create a resizable image viewer
         img_width = st.slider("Image Width", 300, 1000, 600, key="img_width_slider")
-        st.image(image, width=img_width)
+        st.image(image_bytes, width=img_width)
         
         # Add download button
         st.download_button(
             label="Download Image",
-            data=open(self.document_path, "rb"),
+            data=image_bytes,
             file_name=os.path.basename(self.document_path),
             mime=f"image/{self.file_extension[1:]}"
         )
@@ -71,15 +186,19 @@ class DocumentViewer:
     def _render_xml(self):
         """Render an XML document"""
         try:
-            with open(self.document_path, 'r') as f:
-                xml_content = f.read()
-            
-            # Pretty format the XML
-            dom = xml.dom.minidom.parseString(xml_content)
-            pretty_xml = dom.toprettyxml()
+            # Pretty format the XML; only the first view of a file does the work
+            with st.spinner("Formatting XML..."):
+                pretty_xml = _pretty_xml(self.document_path, self._version())
             
-            # Display with syntax highlighting
-            st.code(pretty_xml, language="xml")
+            # Display with syntax highlighting, previewing very large documents
+            displayed_xml = pretty_xml
+            if os.path.getsize(self.document_path) > LARGE_XML_BYTES:
+                lines = pretty_xml.splitlines()
+                if len(lines) > XML_PREVIEW_LINES and not st.checkbox(
+                        f"Show all {len(lines)} lines", key="xml_show_all"):
+                    st.caption(f"Showing the first {XML_PREVIEW_LINES} lines")
+                    displayed_xml = "\n".join(lines[:XML_PREVIEW_LINES])
+            st.code(displayed_xml, language="xml")
             
             # Add download button
             st.download_button(
@@ -2,6 +2,36 @@ import streamlit as st
 import markdown
 import os
 
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _read_guidelines(path, mtime):
+    """Read the guidelines file, cached across reruns
+    
+    Args:
+        path: Path to the guidelines file
+        mtime: Modification time of the file, used to invalidate the cache
+        
+    Returns:
+        The file content as a string
+    """
+    with open(path, 'r') as f:
+        return f.read()
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _render_markdown(path, mtime):
+    """Convert markdown guidelines to HTML, cached across reruns
+    
+    Args:
+        path: Path to the markdown file
+        mtime: Modification time of the file, used to invalidate the cache
+        
+    Returns:
+        The rendered HTML as a string
+    """
+    return markdown.markdown(_read_guidelines(path, mtime))
+
+
 class GuidelinesViewer:
     """Component for displaying guidelines in markdown format"""
     
@@ -20,15 +50,15 @@ class GuidelinesViewer:
             return
         
         try:
-            with open(self.guidelines_path, 'r') as f:
-                guidelines_content = f.read()
+            mtime = os.path.getmtime(self.guidelines_path)
+            guidelines_content = _read_guidelines(self.guidelines_path, mtime)
             
             file_extension = os.path.splitext(self.guidelines_path)[1].lower()
             
             # For markdown files, render as HTML
             if file_extension == ".md":
                 # Convert markdown to HTML
-                html_content = markdown.markdown(guidelines_content)
+                html_content = _render_markdown(self.guidelines_path, mtime)
                 # Display in a scrollable container
                 st.markdown(
                     f"""
@@ -1,31 +1,163 @@
 import streamlit as st
-import json
+import os
 import pandas as pd
 from datetime import datetime
-from utils.json_manager import update_json_with_provenance
+from utils.file_handling import load_file, json_loads
+from utils.json_manager import (
+    update_json_with_provenance,
+    ensure_provenance_log_id,
+    get_provenance_log_path,
+    load_provenance_log,
+    PROVENANCE_LOG_ID_KEY
+)
+
+# Structure of the data when no JSON file could be loaded
+EMPTY_DATA_TEMPLATE = {"values": [], "_provenance": []}
+
+def _empty_data():
+    """Get a fresh copy of the empty data structure
+    
+    Returns:
+        A new dictionary with empty values and provenance lists
+    """
+    return {key: list(value) for key, value in EMPTY_DATA_TEMPLATE.items()}
+
+# Columns of the editable values table
+VALUE_COLUMNS = ("id", "name", "value", "type", "rules")
+
+def _values_frame(values):
+    """Build the editable table from the JSON values
+    
+    Args:
+        values: List of value dictionaries (name, value, type, rules)
+        
+    Returns:
+        DataFrame with one row per value and rules joined into a string
+    """
+    records = []
+    for i, item in enumerate(values):
+        rules = item.get("rules", "")
+        if isinstance(rules, list):
+            rules = ", ".join(rules)
+        records.append((i, item.get("name", ""), item.get("value", ""),
+                        item.get("type", ""), str(rules)))
+    return pd.DataFrame.from_records(records, columns=VALUE_COLUMNS)
+
+def _frame_values(edited_df):
+    """Convert the edited table back into JSON values
+    
+    Args:
+        edited_df: DataFrame returned by the data editor
+        
+    Returns:
+        List of value dictionaries (name, value, type, rules)
+    """
+    # Split the rules strings back into lists in one pass over the column
+    rules = edited_df["rules"].fillna("").astype(str).str.strip()
+    rules = [parts if parts != [""] else [] for parts in rules.str.split(r"\s*,\s*", regex=True)]
+    
+    return edited_df[["name", "value", "type"]].assign(rules=rules).to_dict(orient="records")
+
+def _differs(new, old):
+    """Compare two columns element-wise, treating two missing values as equal
+    
+    Args:
+        new: Series of edited values
+        old: Series of original values
+        
+    Returns:
+        Boolean Series, True where the values differ
+    """
+    return new.ne(old) & ~(new.isna() & old.isna())
+
+def _frame_hash(df):
+    """Compute a cheap content fingerprint of a DataFrame
+    
+    Args:
+        df: DataFrame to fingerprint
+        
+    Returns:
+        Integer hash of the frame's values
+    """
+    return int(pd.util.hash_pandas_object(df, index=False).sum())
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _load_json_cached(path, mtime_ns, size):
+    """Load and parse a JSON file, cached across reruns
+    
+    Each call returns a fresh copy, so callers may modify the result.
+    
+    Args:
+        path: Path to the JSON file
+        mtime_ns: Modification time of the file in nanoseconds
+        size: Size of the file in bytes; with mtime_ns, invalidates the cache
+        
+    Returns:
+        The parsed JSON data, with its provenance log id
+    """
+    data = load_file(path)
+    if isinstance(data, dict):
+        ensure_provenance_log_id(data)
+    return data
+
 
 class JsonEditor:
     """Component for displaying and editing extracted JSON data with rules"""
     
-    def __init__(self, json_path, user_info):
+    __slots__ = ("json_path", "user_info", "provenance_log_path", "pending_provenance", "data")
+    
+    def __init__(self, json_path, user_info, provenance_log_path=None):
         """Initialize the JSON editor
         
         Args:
-            json_path: Path to the JSON file with extracted data
+            json_path: Path to the JSON file with extracted data, or a binary
+                file-like object to read it from (its name, if any, is used
+                as the path)
             user_info: Dictionary with user information (name, email)
+            provenance_log_path: Path to the append-only provenance log
+                (defaults to the document's log next to the JSON file)
         """
-        self.json_path = json_path
         self.user_info = user_info
-        self.data = self._load_json()
+        self.pending_provenance = None
+        if hasattr(json_path, "read"):
+            self.json_path = getattr(json_path, "name", None)
+            self.data = self._load_stream(json_path)
+        else:
+            self.json_path = json_path
+            self.data = self._load_json()
+        
+        # New provenance entries go to an append-only log rather than the JSON
+        # file; the log is named by the id the document carries, not its file
+        log_id = self.data.get(PROVENANCE_LOG_ID_KEY)
+        if provenance_log_path is None and self.json_path and log_id:
+            provenance_log_path = get_provenance_log_path(os.path.dirname(self.json_path), log_id)
+        self.provenance_log_path = provenance_log_path
+    
+    def _load_stream(self, stream):
+        """Load JSON data from a file-like object"""
+        try:
+            data = json_loads(stream.read())
+            if isinstance(data, dict):
+                ensure_provenance_log_id(data)
+            return data
+        except Exception as e:
+            st.error(f"Error loading JSON data: {e}")
+            return _empty_data()
     
     def _load_json(self):
         """Load JSON data from file"""
+        # Check for a missing file up front rather than failing in open()
+        if not os.path.isfile(self.json_path):
+            st.error(f"JSON file not found: {self.json_path}")
+            return _empty_data()
+        
         try:
-            with open(self.json_path, 'r') as f:
-                return json.load(f)
+            stat = os.stat(self.json_path)
+            return _load_json_cached(self.json_path, stat.st_mtime_ns, stat.st_size)
         except Exception as e:
             st.error(f"Error loading JSON data: {e}")
-            return {"values": [], "_provenance": []}
+            return _empty_data()
     
     def render(self):
         """Render the JSON editor in the Streamlit UI
@@ -43,28 +175,8 @@ class JsonEditor:
         if "_provenance" not in self.data:
             self.data["_provenance"] = []
         
-        # Create a DataFrame for easier editing
-        values_data = []
-        for i, item in enumerate(self.data["values"]):
-            row = {
-                "id": i,
-                "name": item.get("name", ""),
-                "value": item.get("value", ""),
-                "type": item.get("type", ""),
-            }
-            
-            # Add rules if they exist
-            if "rules" in item:
-                if isinstance(item["rules"], list):
-                    row["rules"] = ", ".join(item["rules"])
-                else:
-                    row["rules"] = str(item["rules"])
-            else:
-                row["rules"] = ""
-                
-            values_data.append(row)
-        
-        df = pd.DataFrame(values_data)
+        # Get the table of the unedited values, built once per file version
+        df, original_hash = self._original_frame()
         
         # Display the data editor
         if len(df) > 0:
@@ -93,98 +205,139 @@ class JsonEditor:
                 key="edit_notes"
             )
             
-            # Process changes
-            if not edited_df.equals(df):
-                # Find changes
-                changes = []
-                
-                # Check for row additions and modifications
-                for _, row in edited_df.iterrows():
-                    row_id = row["id"]
-                    
-                    # Handle new rows (those with id beyond original data)
-                    if row_id >= len(self.data["values"]):
-                        changes.append({
-                            "field": row["name"],
-                            "old_value": None,
-                            "new_value": row["value"],
-                            "action": "added"
-                        })
-                    # Handle modified rows
-                    elif (row["name"] != df.loc[df["id"] == row_id, "name"].values[0] or
-                          row["value"] != df.loc[df["id"] == row_id, "value"].values[0] or
-                          row["type"] != df.loc[df["id"] == row_id, "type"].values[0] or
-                          row["rules"] != df.loc[df["id"] == row_id, "rules"].values[0]):
-                        changes.append({
-                            "field": row["name"],
-                            "old_value": df.loc[df["id"] == row_id, "value"].values[0],
-                            "new_value": row["value"],
-                            "action": "modified"
-                        })
-                
-                # Check for row deletions
-                original_ids = set(df["id"])
-                current_ids = set(edited_df["id"])
-                deleted_ids = original_ids - current_ids
-                
-                for id_val in deleted_ids:
-                    deleted_row = df.loc[df["id"] == id_val].iloc[0]
-                    changes.append({
-                        "field": deleted_row["name"],
-                        "old_value": deleted_row["value"],
-                        "new_value": None,
-                        "action": "deleted"
-                    })
-                
-                # Update the JSON data with changes
-                updated_values = []
-                for _, row in edited_df.iterrows():
-                    # Convert rules back to list if needed
-                    rules = row["rules"]
-                    if isinstance(rules, str) and rules:
-                        rules = [r.strip() for r in rules.split(",")]
-                    
-                    updated_values.append({
-                        "name": row["name"],
-                        "value": row["value"],
-                        "type": row["type"],
-                        "rules": rules if rules else []
-                    })
+            # Process changes, skipping the diff when the editor output is untouched
+            edited_hash = _frame_hash(edited_df)
+            if edited_hash != original_hash:
+                # Rebuild the values and find changes, once per distinct edit
+                updated_values, changes = self._apply_edits(
+                    df, edited_df, (original_hash, edited_hash)
+                )
                 
                 # Update the data
                 self.data["values"] = updated_values
                 
-                # Add provenance
+                # Record provenance; it is appended to the log when the data is saved
                 if changes:
-                    provenance_entry = {
+                    self.pending_provenance = {
                         "timestamp": datetime.now().isoformat(),
                         "user": self.user_info,
                         "document": self.json_path,
                         "changes": changes,
                         "notes": edit_notes
                     }
-                    self.data["_provenance"].append(provenance_entry)
                     
                     # Show summary of changes
                     st.subheader("Changes Detected")
                     changes_df = pd.DataFrame(changes)
                     st.dataframe(changes_df)
             
-            # Display provenance information
-            if self.data["_provenance"]:
-                with st.expander("View Edit History"):
-                    for i, entry in enumerate(reversed(self.data["_provenance"])):
-                        st.write(f"**Edit {i+1}**: {entry['timestamp']}")
-                        st.write(f"**User**: {entry['user'].get('name', 'Unknown')} ({entry['user'].get('email', 'No email')})")
-                        st.write(f"**Document**: {entry['document']}")
-                        st.write("**Changes**:")
-                        changes_df = pd.DataFrame(entry["changes"])
-                        st.dataframe(changes_df)
-                        if entry.get("notes"):
-                            st.write(f"**Notes**: {entry['notes']}")
-                        st.divider()
+            # Display provenance information, reading the log only when requested
+            if st.checkbox("View Edit History", key="show_edit_history"):
+                history = self.data["_provenance"] + load_provenance_log(self.provenance_log_path)
+                if not history:
+                    st.info("No edits have been saved yet.")
+                for i, entry in enumerate(reversed(history)):
+                    st.write(f"**Edit {i+1}**: {entry['timestamp']}")
+                    st.write(f"**User**: {entry['user'].get('name', 'Unknown')} ({entry['user'].get('email', 'No email')})")
+                    st.write(f"**Document**: {entry['document']}")
+                    st.write("**Changes**:")
+                    changes_df = pd.DataFrame(entry["changes"])
+                    st.dataframe(changes_df)
+                    if entry.get("notes"):
+                        st.write(f"**Notes**: {entry['notes']}")
+                    st.divider()
             
             return self.data
         else:
             st.info("No data values found. Add values using the 'Add row' button.")
-            return self.data
\ No newline at end of file
+            return self.data
+    
+    def _original_frame(self):
+        """Get the table of the unedited values, cached in session state
+        
+        The table and its fingerprint are rebuilt only when the JSON file
+        changes; data loaded from a stream is not cached.
+        
+        Returns:
+            Tuple of (DataFrame built from the original JSON values, its hash)
+        """
+        key = None
+        if self.json_path and os.path.isfile(self.json_path):
+            stat = os.stat(self.json_path)
+            key = (self.json_path, stat.st_mtime_ns, stat.st_size)
+        
+        cached = st.session_state.get("_json_editor_frame")
+        if key is None or cached is None or cached[0] != key:
+            df = _values_frame(self.data["values"])
+            cached = (key, df, _frame_hash(df))
+            if key is not None:
+                st.session_state["_json_editor_frame"] = cached
+        return cached[1], cached[2]
+    
+    def _apply_edits(self, df, edited_df, key):
+        """Get the edited values and their changes, cached in session state
+        
+        Reruns that leave the editor untouched (e.g. toggling another widget)
+        reuse the previous result instead of converting and diffing again.
+        
+        Args:
+            df: DataFrame built from the original JSON values
+            edited_df: DataFrame returned by the data editor
+            key: Tuple of (original table hash, edited table hash)
+            
+        Returns:
+            Tuple of (list of updated values, list of changes)
+        """
+        cached = st.session_state.get("_json_editor_edits")
+        if cached is None or cached[0] != key:
+            cached = (key, _frame_values(edited_df), self._detect_changes(df, edited_df))
+            st.session_state["_json_editor_edits"] = cached
+        return list(cached[1]), cached[2]
+    
+    def _detect_changes(self, df, edited_df):
+        """Compare the edited table against the original one
+        
+        Args:
+            df: DataFrame built from the original JSON values
+            edited_df: DataFrame returned by the data editor
+            
+        Returns:
+            List of changes (field, old_value, new_value, action)
+        """
+        # Merge object columns so the missing side of an added or deleted
+        # row doesn't turn integer values into floats
+        merged = edited_df.astype(object).merge(
+            df.astype(object), on="id", how="outer", suffixes=("_new", "_old"), indicator=True
+        )
+        
+        added = merged["_merge"] == "left_only"
+        deleted = merged["_merge"] == "right_only"
+        modified = (merged["_merge"] == "both") & (
+            _differs(merged["name_new"], merged["name_old"]) |
+            _differs(merged["value_new"], merged["value_old"]) |
+            _differs(merged["type_new"], merged["type_old"]) |
+            _differs(merged["rules_new"], merged["rules_old"])
+        )
+        
+        changes = []
+        
+        # Row additions and modifications, in table order
+        for row in merged[added | modified].to_dict(orient="records"):
+            is_added = row["_merge"] == "left_only"
+            changes.append({
+                "field": row["name_new"],
+                "old_value": None if is_added else row["value_old"],
+                "new_value": row["value_new"],
+                "action": "added" if is_added else "modified"
+            })
+        
+        # Row deletions
+        for row in merged[deleted].to_dict(orient="records"):
+            changes.append({
+                "field": row["name_old"],
+                "old_value": row["value_old"],
+                "new_value": None,
+                "action": "deleted"
+            })
+        
+        return changes
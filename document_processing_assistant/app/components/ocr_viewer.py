@@ -1,11 +1,71 @@
 import streamlit as st
-import json
 import numpy as np
 import os
-from PIL import Image, ImageDraw
-import fitz  # PyMuPDF for PDF handling
-import tempfile
-import base64
+from PIL import Image, ImageDraw, ImageFont
+from utils.pdf_utils import FITZ_LOCK, open_pdf
+from utils.image_utils import draw_outlines
+from utils.ocr_parser import load_ocr_index
+
+# Width (in pixels) PDF pages are rasterized at for the OCR overlay rather
+# than a fixed DPI; about the width of the viewer's column in the wide
+# layout on a 1920-pixel screen, which the image is scaled to fit
+RENDER_WIDTH = 1200
+
+# Font for block labels, loaded once rather than on every draw
+LABEL_FONT = ImageFont.load_default()
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _pdf_page_widths(path, mtime):
+    """Get the width of every page in a PDF, cached across reruns
+    
+    Args:
+        path: Path to the PDF file
+        mtime: Modification time of the file, used to invalidate the cache
+        
+    Returns:
+        List of page widths in PDF points, one per page
+    """
+    with FITZ_LOCK:
+        return [page.rect.width for page in open_pdf(path, mtime)]
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _rasterize_pdf_page(path, mtime, page_num, zoom_tenths):
+    """Rasterize a single PDF page to raw RGB pixels, cached across reruns
+    
+    Args:
+        path: Path to the PDF file
+        mtime: Modification time of the file, used to invalidate the cache
+        page_num: Page number (0-based) to rasterize
+        zoom_tenths: Zoom factor in tenths, so nearby widths share an entry
+        
+    Returns:
+        Tuple of (width, height, samples) where samples holds the page's
+        RGB pixels, so no PNG encode/decode round trip is needed to show it
+    """
+    import fitz  # PyMuPDF; only needed for PDF documents
+    
+    zoom = zoom_tenths / 10
+    with FITZ_LOCK:
+        pix = open_pdf(path, mtime)[page_num].get_pixmap(
+            matrix=fitz.Matrix(zoom, zoom), alpha=False
+        )
+        return pix.width, pix.height, pix.samples
+
+
+def _zoom_tenths(display_width, page_width):
+    """Get the zoom factor, in tenths, that renders a page at a given width
+    
+    Args:
+        display_width: Target width in pixels
+        page_width: Page width in PDF points
+        
+    Returns:
+        Zoom factor multiplied by 10 and rounded, at least 1
+    """
+    return max(1, round(display_width / page_width * 10))
+
 
 class OcrViewer:
     """Component for visualizing OCR data with bounding boxes"""
@@ -19,17 +79,21 @@ class OcrViewer:
         """
         self.document_path = document_path
         self.ocr_path = ocr_path
+        self._blocks_by_page = {}
+        self._bboxes_by_page = {}
         self.ocr_data = self._load_ocr_data()
         self.file_extension = os.path.splitext(document_path)[1].lower()
     
     def _load_ocr_data(self):
-        """Load OCR data from JSON file"""
+        """Load OCR data from JSON file and build the page index"""
         if not os.path.exists(self.ocr_path):
             return None
         
         try:
-            with open(self.ocr_path, 'r') as f:
-                return json.load(f)
+            ocr_data, self._blocks_by_page, self._bboxes_by_page = load_ocr_index(
+                self.ocr_path, os.path.getmtime(self.ocr_path)
+            )
+            return ocr_data
         except Exception as e:
             st.error(f"Error loading OCR data: {e}")
             return None
@@ -43,27 +107,22 @@ class OcrViewer:
         # Get document pages
         if self.file_extension == ".pdf":
             try:
-                pdf_document = fitz.open(self.document_path)
-                num_pages = len(pdf_document)
+                mtime = os.path.getmtime(self.document_path)
+                page_widths = _pdf_page_widths(self.document_path, mtime)
+                num_pages = len(page_widths)
                 
                 # Page selector
                 page_num = st.slider("Select Page", 1, num_pages, 1, key="ocr_page_slider") - 1
                 
-                # Extract page as image
-                page = pdf_document[page_num]
-                pix = page.get_pixmap()
-                
-                # Save to a temporary file
-                with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as temp_file:
-                    pix.save(temp_file.name)
-                    img_path = temp_file.name
+                # Extract page as image, rendered at the column's width
+                zoom_tenths = _zoom_tenths(RENDER_WIDTH, page_widths[page_num])
+                width, height, samples = _rasterize_pdf_page(
+                    self.document_path, mtime, page_num, zoom_tenths
+                )
+                image = Image.frombytes("RGB", (width, height), samples)
                 
                 # Visualize OCR on this page
-                self._visualize_ocr_on_image(img_path, page_num)
-                
-                # Clean up
-                os.unlink(img_path)
-                pdf_document.close()
+                self._visualize_ocr_on_image(image, page_num)
                 
             except Exception as e:
                 st.error(f"Error rendering PDF with OCR: {e}")
@@ -75,21 +134,19 @@ class OcrViewer:
         else:
             st.error(f"OCR visualization not supported for file type: {self.file_extension}")
     
-    def _visualize_ocr_on_image(self, img_path, page_num):
+    def _visualize_ocr_on_image(self, img_file, page_num):
         """Draw OCR bounding boxes on an image
         
         Args:
-            img_path: Path to the image
+            img_file: Path to the image, a file-like object containing it,
+                or an already loaded PIL image
             page_num: Page number (0-based) to visualize
         """
         try:
             # Load image
-            image = Image.open(img_path)
+            image = img_file if isinstance(img_file, Image.Image) else Image.open(img_file)
             img_width, img_height = image.size
             
-            # Create a drawing context
-            draw = ImageDraw.Draw(image)
-            
             # Extract bounding boxes for the page
             blocks = self._extract_blocks_for_page(page_num)
             
@@ -110,28 +167,28 @@ class OcrViewer:
                 (128, 0, 255, 128),  # Purple
             ]
             
-            # Draw bounding boxes
-            for i, block in enumerate(blocks):
-                color = colors[i % len(colors)]
-                
-                # Get coordinates (normalized to image dimensions)
-                left = block["Geometry"]["BoundingBox"]["Left"] * img_width
-                top = block["Geometry"]["BoundingBox"]["Top"] * img_height
-                width = block["Geometry"]["BoundingBox"]["Width"] * img_width
-                height = block["Geometry"]["BoundingBox"]["Height"] * img_height
-                
-                # Calculate rectangle coordinates
-                rect = [(left, top), (left + width, top + height)]
-                
-                # Draw rectangle
-                draw.rectangle(rect, outline=color, width=2)
-                
-                # Draw text label (if it's a word or line)
+            # Scale all normalized bounding boxes to pixel coordinates at once
+            bboxes = self._bboxes_by_page[page_num]
+            scale = np.array([img_width, img_height, img_width, img_height], dtype=np.float32)
+            coords = (bboxes * scale).astype(np.int32)
+            coords[:, 2:] += coords[:, :2]
+            color_indices = np.arange(len(blocks)) % len(colors)
+            
+            # Drawing on the RGB page ignored the alpha channel, so outline
+            # and label with the opaque colors to keep the same look
+            opaque_colors = np.array(colors)[:, :3]
+            
+            # Draw all bounding boxes in one overlay, then the labels on top
+            image = draw_outlines(image, coords, opaque_colors[color_indices])
+            draw_text = ImageDraw.Draw(image).text
+            label_colors = [tuple(color) for color in opaque_colors.tolist()]
+            
+            # Draw text labels
+            for i, (left, top) in enumerate(coords[:, :2].tolist()):
+                block = blocks[i]
                 if "Text" in block:
-                    text = block["Text"]
-                    confidence = block.get("Confidence", 0)
-                    label = f"{text} ({confidence:.1f}%)"
-                    draw.text((left, top - 10), label, fill=color[:3])
+                    label = f"{block['Text']} ({block.get('Confidence', 0):.1f}%)"
+                    draw_text((left, top - 10), label, fill=label_colors[color_indices[i]], font=LABEL_FONT)
             
             # Display image with bounding boxes
             st.image(image, use_column_width=True)
@@ -155,25 +212,4 @@ class OcrViewer:
         Returns:
             List of text block objects with geometry and text
         """
-        # Handle different Textract JSON formats
-        if "Blocks" in self.ocr_data:
-            # Standard Textract format
-            blocks = []
-            for block in self.ocr_data["Blocks"]:
-                # Check if block belongs to the current page
-                if block.get("Page", 1) - 1 == page_num:
-                    if block["BlockType"] in ["WORD", "LINE"]:
-                        blocks.append(block)
-            return blocks
-            
-        elif "Pages" in self.ocr_data and len(self.ocr_data["Pages"]) > page_num:
-            # Alternative format with pages array
-            page_data = self.ocr_data["Pages"][page_num]
-            if "Blocks" in page_data:
-                return [b for b in page_data["Blocks"] if b["BlockType"] in ["WORD", "LINE"]]
-        
-        # If we have a simple array of blocks without page info, assume it's for page 0
-        elif isinstance(self.ocr_data, list) and page_num == 0:
-            return [b for b in self.ocr_data if b.get("BlockType") in ["WORD", "LINE"]]
-            
-        return []
\ No newline at end of file
+        return self._blocks_by_page.get(page_num, [])
@@ -1,12 +1,243 @@
 import streamlit as st
-import re
-import json
-import fitz  # PyMuPDF
 import os
-from PIL import Image, ImageDraw
+import io
+from PIL import Image
 import numpy as np
-import tempfile
-import base64
+from utils.pdf_utils import FITZ_LOCK, open_pdf
+from utils.image_utils import draw_outlines
+from utils.ocr_parser import BBOX_KEYS, load_ocr_index
+from utils.pdf_search import fuzzy_span, scan_pdf_pages, scan_pdf_batches
+
+# Zoom used to render PDF pages for the highlighted preview (~54 DPI);
+# the preview is scaled to the column width anyway
+PREVIEW_ZOOM = 0.75
+
+# PDFs with at least this many pages are searched on a process pool,
+# a batch of pages per task
+PARALLEL_MIN_PAGES = 50
+PAGES_PER_BATCH = 10
+
+# Matches are listed this many at a time, with a selector for the rest,
+# to keep the page light
+MATCHES_PER_PAGE = 200
+
+
+def _render_match_list(texts, key):
+    """Show numbered match texts as a single markdown list, a page at a time
+    
+    Args:
+        texts: Text to show for each match, in order
+        key: Widget key for the page selector shown for long lists
+    """
+    start = 0
+    if len(texts) > MATCHES_PER_PAGE:
+        num_pages = -(-len(texts) // MATCHES_PER_PAGE)
+        page = st.number_input(f"Matches page (of {num_pages})", 1, num_pages, 1, key=key)
+        start = (page - 1) * MATCHES_PER_PAGE
+        end = min(start + MATCHES_PER_PAGE, len(texts))
+        st.caption(f"Showing matches {start + 1}-{end} of {len(texts)}")
+    
+    # One markdown element for the whole list rather than one per match;
+    # newlines inside a text would break the list, so they become spaces
+    shown = texts[start:start + MATCHES_PER_PAGE]
+    lines = [f"{i}. {' '.join(text.splitlines())}" for i, text in enumerate(shown, start + 1)]
+    st.markdown("\n".join(lines))
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _read_text(path, mtime):
+    """Read a text document, cached across reruns
+    
+    Args:
+        path: Path to the text file
+        mtime: Modification time of the file, used to invalidate the cache
+        
+    Returns:
+        The file content as a string
+    """
+    with open(path, 'r') as f:
+        return f.read()
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def _pdf_sections(path, mtime):
+    """Get the sections of a PDF from its table of contents, cached across reruns
+    
+    A section runs from its entry's page up to the page before the next
+    entry at the same or a higher level.
+    
+    Args:
+        path: Path to the PDF file
+        mtime: Modification time of the file, used to invalidate the cache
+        
+    Returns:
+        List of (label, first_page, last_page) tuples with 0-based, inclusive
+        page numbers, in table of contents order; empty if there is no TOC
+    """
+    pdf_document = open_pdf(path, mtime)
+    with FITZ_LOCK:
+        toc = pdf_document.get_toc()
+        page_count = pdf_document.page_count
+    
+    sections = []
+    for i, (level, title, page) in enumerate(toc):
+        if page < 1:
+            continue
+        next_page = next(
+            (p for lvl, _, p in toc[i + 1:] if lvl <= level and p >= 1), page_count + 1
+        )
+        label = f"{'  ' * (level - 1)}{title} (p. {page})"
+        sections.append((label, page - 1, max(page, next_page - 1) - 1))
+    return sections
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _pdf_scan(path, mtime, query, search_type, first_page=0, last_page=None):
+    """Find the matches of a query in a PDF, cached across reruns
+    
+    Long documents are scanned in batches on worker processes, each with
+    its own open copy of the document, since PyMuPDF is not thread-safe.
+    
+    Args:
+        path: Path to the PDF file
+        mtime: Modification time of the file, used to invalidate the cache
+        query: Search query string
+        search_type: Type of search to perform
+        first_page: First page (0-based) to search
+        last_page: Last page (0-based, inclusive) to search, None for the end
+        
+    Returns:
+        List of matches (page, rect, context)
+    """
+    pdf_document = open_pdf(path, mtime)
+    with FITZ_LOCK:
+        page_count = pdf_document.page_count
+    if last_page is None or last_page >= page_count:
+        last_page = page_count - 1
+    page_nums = range(first_page, last_page + 1)
+    
+    if len(page_nums) < PARALLEL_MIN_PAGES:
+        with FITZ_LOCK:
+            return scan_pdf_pages(pdf_document, page_nums, query, search_type)
+    
+    batches = [
+        page_nums[i:i + PAGES_PER_BATCH]
+        for i in range(0, len(page_nums), PAGES_PER_BATCH)
+    ]
+    return scan_pdf_batches(path, mtime, batches, query, search_type)
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def _ocr_text_blocks(path, mtime):
+    """Get the OCR text blocks and a text index over them, cached across reruns
+    
+    The index is the lowercased text of every block joined by newlines, so
+    a query can be matched against all blocks in one pass over one string.
+    
+    Args:
+        path: Path to the OCR data file (Textract JSON format)
+        mtime: Modification time of the file, used to invalidate the cache
+        
+    Returns:
+        Tuple of (blocks, text, starts) where text is the joined lowercased
+        block text and starts holds the offset in it where each block begins
+    """
+    _, blocks_by_page, _ = load_ocr_index(path, mtime)
+    
+    blocks = [b for page_num in sorted(blocks_by_page)
+              for b in blocks_by_page[page_num] if "Text" in b]
+    
+    # Newlines separate the blocks, so block text must not contain any
+    texts_lower = [b["Text"].lower().replace("\n", " ") for b in blocks]
+    lengths = np.fromiter((len(t) + 1 for t in texts_lower), dtype=np.int64, count=len(blocks))
+    starts = np.concatenate(([0], np.cumsum(lengths)[:-1])).astype(np.int64)
+    return blocks, "\n".join(texts_lower), starts
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _image_scan(ocr_path, mtime, query, search_type):
+    """Find the OCR text blocks matching a query, cached across reruns
+    
+    Args:
+        ocr_path: Path to the OCR data file (Textract JSON format)
+        mtime: Modification time of the OCR file, used to invalidate the cache
+        query: Search query string
+        search_type: Type of search to perform
+        
+    Returns:
+        List of indices into the blocks returned by _ocr_text_blocks
+    """
+    _, text, starts = _ocr_text_blocks(ocr_path, mtime)
+    q_lower = query.lower()
+    
+    if search_type == "Fuzzy Match":
+        # Simple fuzzy match; it never crosses a newline, so never spans blocks
+        def find(pos):
+            return fuzzy_span(text, q_lower, pos)
+    
+    elif search_type in ("Exact Match", "Semantic Search (stub)") and q_lower:
+        # Case-insensitive contains; the semantic search is a stub for now
+        def find(pos):
+            idx = text.find(q_lower, pos)
+            return None if idx < 0 else (idx, idx + len(q_lower))
+    
+    else:
+        return []
+    
+    # Scan the joined text once, resuming at the next block after each hit
+    indices = []
+    span = find(0)
+    while span is not None:
+        block_index = int(np.searchsorted(starts, span[0], side="right")) - 1
+        indices.append(block_index)
+        if block_index + 1 >= len(starts):
+            break
+        span = find(int(starts[block_index + 1]))
+    return indices
+
+
+@st.cache_data(max_entries=64, show_spinner=False)
+def _xml_scan(path, mtime, query, search_type):
+    """Find the lines of an XML document matching a query, cached across reruns
+    
+    Args:
+        path: Path to the XML file
+        mtime: Modification time of the file, used to invalidate the cache
+        query: Search query string
+        search_type: Type of search to perform
+        
+    Returns:
+        Tuple of (results, highlighted) where results lists the matching
+        lines (line, content) and highlighted is the XML with matches marked
+    """
+    q_lower = query.lower()
+    
+    # Pick the line test for the search type
+    if search_type == "Exact Match":
+        # Find all matches
+        def is_match(line):
+            return query in line
+    
+    elif search_type == "Fuzzy Match":
+        # Simple fuzzy search
+        def is_match(line):
+            return fuzzy_span(line.lower(), q_lower) is not None
+    
+    else:
+        # Stub implementation of the semantic search
+        def is_match(line):
+            return q_lower in line.lower()
+    
+    # Scan the lines once, building the highlighted XML as we go
+    results = []
+    highlighted = io.StringIO()
+    for i, line in enumerate(io.StringIO(_read_text(path, mtime)), 1):
+        if is_match(line):
+            results.append({"line": i, "content": line.strip()})
+            line = line.replace(query, f"**{query}**")
+        highlighted.write(line)
+    
+    return results, highlighted.getvalue()
 
 class DocumentSearch:
     """Component for searching documents with semantic capabilities"""
@@ -29,8 +260,7 @@ class DocumentSearch:
             return None
         
         try:
-            with open(self.ocr_path, 'r') as f:
-                return json.load(f)
+            return load_ocr_index(self.ocr_path, os.path.getmtime(self.ocr_path))[0]
         except Exception as e:
             st.error(f"Error loading OCR data for search: {e}")
             return None
@@ -64,75 +294,32 @@ class DocumentSearch:
             query: Search query string
             search_type: Type of search to perform
         """
+        import fitz  # PyMuPDF; only needed for PDF documents
+        
         try:
-            # Open PDF document
-            pdf_document = fitz.open(self.document_path)
-            results = []
-            
-            # Search based on type
-            if search_type == "Exact Match":
-                # Use PyMuPDF's search function
-                for page_num, page in enumerate(pdf_document):
-                    matches = page.search_for(query)
-                    if matches:
-                        # Extract some context around each match
-                        for match in matches:
-                            # Get words near the match for context
-                            words = page.get_text("words")
-                            context = " ".join([w[4] for w in words if self._is_near_rect(w[:4], match)])
-                            
-                            results.append({
-                                "page": page_num + 1,
-                                "rect": match,
-                                "context": context
-                            })
+            # Get the shared PDF document; the cache owns it, so it is not closed here
+            mtime = os.path.getmtime(self.document_path)
+            pdf_document = open_pdf(self.document_path, mtime)
             
-            elif search_type == "Fuzzy Match":
-                # Simple fuzzy search implementation
-                pattern = "".join([f"{c}.*?" for c in query])
-                for page_num, page in enumerate(pdf_document):
-                    text = page.get_text()
-                    matches = re.finditer(pattern, text, re.IGNORECASE)
-                    
-                    for match in matches:
-                        # Get some context around the match
-                        start = max(0, match.start() - 50)
-                        end = min(len(text), match.end() + 50)
-                        context = text[start:end]
-                        
-                        # Find the location of the match on the page
-                        # (this is approximate since we don't have exact coordinates)
-                        words = page.get_text("words")
-                        match_rect = None
-                        
-                        for word in words:
-                            if word[4].lower() in context.lower():
-                                match_rect = word[:4]
-                                break
-                        
-                        results.append({
-                            "page": page_num + 1,
-                            "rect": match_rect,
-                            "context": context
-                        })
+            # Let the user narrow long documents down to a table of contents section
+            first_page, last_page = 0, None
+            sections = _pdf_sections(self.document_path, mtime)
+            if sections:
+                section = st.selectbox(
+                    "Search in section:",
+                    [None] + sections,
+                    format_func=lambda section: "All pages" if section is None else section[0],
+                    key="search_section"
+                )
+                if section is not None:
+                    _, first_page, last_page = section
             
-            elif search_type == "Semantic Search (stub)":
+            if search_type == "Semantic Search (stub)":
                 st.info("Semantic search would use embeddings to find related content.")
-                # Stub implementation - just do a case-insensitive search
-                for page_num, page in enumerate(pdf_document):
-                    text = page.get_text().lower()
-                    if query.lower() in text:
-                        # Find position of match in text
-                        idx = text.find(query.lower())
-                        start = max(0, idx - 50)
-                        end = min(len(text), idx + len(query) + 50)
-                        context = text[start:end]
-                        
-                        results.append({
-                            "page": page_num + 1,
-                            "rect": None,  # We don't have exact coordinates
-                            "context": context
-                        })
+            
+            results = _pdf_scan(
+                self.document_path, mtime, query, search_type, first_page, last_page
+            )
             
             # Display results
             if results:
@@ -149,45 +336,32 @@ class DocumentSearch:
                 # Display each page with highlights
                 for page, page_matches in page_results.items():
                     with st.expander(f"Page {page} - {len(page_matches)} matches"):
-                        # Extract page as image
-                        pdf_page = pdf_document[page - 1]
-                        pix = pdf_page.get_pixmap()
-                        
-                        # Save to a temporary file
-                        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as temp_file:
-                            pix.save(temp_file.name)
-                            img_path = temp_file.name
+                        # Show the context text
+                        _render_match_list([match["context"] for match in page_matches],
+                                           key=f"search_matches_page_{page}")
                         
-                        # Draw highlights on the image
-                        image = Image.open(img_path)
-                        draw = ImageDraw.Draw(image)
+                        # Rendering the page is the costly part, so skip it
+                        # when there is nothing to highlight on it
+                        if not any(match["rect"] for match in page_matches):
+                            continue
                         
-                        # Highlight each match
-                        for match in page_matches:
-                            if match["rect"]:
-                                # Draw a highlight rectangle
-                                rect = match["rect"]
-                                draw.rectangle(
-                                    [(rect[0], rect[1]), (rect[2], rect[3])],
-                                    outline=(255, 0, 0),
-                                    width=2
-                                )
+                        # Extract page as image at the preview zoom, holding the
+                        # lock only while PyMuPDF renders and the samples are copied
+                        with FITZ_LOCK:
+                            pix = pdf_document[page - 1].get_pixmap(
+                                matrix=fitz.Matrix(PREVIEW_ZOOM, PREVIEW_ZOOM), alpha=False
+                            )
+                            image = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
                         
-                        # Show the context text
-                        for i, match in enumerate(page_matches):
-                            st.write(f"{i+1}. {match['context']}")
+                        # Highlight each match, scaled to the preview zoom
+                        rects = [match["rect"] for match in page_matches if match["rect"]]
+                        image = draw_outlines(image, np.array(rects) * PREVIEW_ZOOM)
                         
                         # Display the image with highlights
                         st.image(image, use_column_width=True)
-                        
-                        # Clean up
-                        os.unlink(img_path)
             else:
                 st.info(f"No matches found for '{query}'")
             
-            # Clean up
-            pdf_document.close()
-            
         except Exception as e:
             st.error(f"Error searching PDF: {e}")
     
@@ -206,65 +380,34 @@ class DocumentSearch:
             # Load the image
             image = Image.open(self.document_path)
             img_width, img_height = image.size
-            draw = ImageDraw.Draw(image)
             
-            results = []
-            
-            # Extract text blocks
-            blocks = []
-            if "Blocks" in self.ocr_data:
-                blocks = [b for b in self.ocr_data["Blocks"] 
-                         if b["BlockType"] in ["WORD", "LINE"] and "Text" in b]
-            elif isinstance(self.ocr_data, list):
-                blocks = [b for b in self.ocr_data 
-                         if b.get("BlockType") in ["WORD", "LINE"] and "Text" in b]
-            
-            # Search based on type
-            if search_type == "Exact Match":
-                # Case-insensitive exact match
-                for block in blocks:
-                    if query.lower() in block["Text"].lower():
-                        results.append(block)
-            
-            elif search_type == "Fuzzy Match":
-                # Simple fuzzy match
-                pattern = "".join([f"{c}.*?" for c in query])
-                for block in blocks:
-                    if re.search(pattern, block["Text"], re.IGNORECASE):
-                        results.append(block)
-            
-            elif search_type == "Semantic Search (stub)":
+            if search_type == "Semantic Search (stub)":
                 st.info("Semantic search would use embeddings to find related content.")
-                # Stub implementation - just case-insensitive contains
-                for block in blocks:
-                    if query.lower() in block["Text"].lower():
-                        results.append(block)
+            
+            # Find the matching text blocks
+            mtime = os.path.getmtime(self.ocr_path)
+            blocks, _, _ = _ocr_text_blocks(self.ocr_path, mtime)
+            results = [blocks[i] for i in _image_scan(self.ocr_path, mtime, query, search_type)]
             
             # Display results
             if results:
                 st.success(f"Found {len(results)} matches")
                 
-                # Draw bounding boxes on matches
-                for block in results:
-                    # Get coordinates (normalized to image dimensions)
-                    left = block["Geometry"]["BoundingBox"]["Left"] * img_width
-                    top = block["Geometry"]["BoundingBox"]["Top"] * img_height
-                    width = block["Geometry"]["BoundingBox"]["Width"] * img_width
-                    height = block["Geometry"]["BoundingBox"]["Height"] * img_height
-                    
-                    # Calculate rectangle coordinates
-                    rect = [(left, top), (left + width, top + height)]
-                    
-                    # Draw rectangle
-                    draw.rectangle(rect, outline=(255, 0, 0), width=2)
+                # Scale the normalized bounding boxes to pixels and outline them
+                bboxes = np.array(
+                    [[block["Geometry"]["BoundingBox"][k] for k in BBOX_KEYS] for block in results],
+                    dtype=np.float64
+                )
+                bboxes *= [img_width, img_height, img_width, img_height]
+                bboxes[:, 2:] += bboxes[:, :2]
+                image = draw_outlines(image, bboxes)
                 
                 # Display image with highlights
                 st.image(image, use_column_width=True)
                 
                 # Show the matched text
                 st.subheader("Matched Text:")
-                for i, match in enumerate(results):
-                    st.write(f"{i+1}. {match['Text']}")
+                _render_match_list([match["Text"] for match in results], key="search_matches_image")
             else:
                 st.info(f"No matches found for '{query}'")
                 
@@ -279,31 +422,12 @@ class DocumentSearch:
             search_type: Type of search to perform
         """
         try:
-            with open(self.document_path, 'r') as f:
-                xml_content = f.read()
-            
-            results = []
-            
-            # Search based on type
-            if search_type == "Exact Match":
-                # Find all matches
-                for i, line in enumerate(xml_content.split('\n')):
-                    if query in line:
-                        results.append({"line": i + 1, "content": line.strip()})
-            
-            elif search_type == "Fuzzy Match":
-                # Simple fuzzy search
-                pattern = "".join([f"{c}.*?" for c in query])
-                for i, line in enumerate(xml_content.split('\n')):
-                    if re.search(pattern, line, re.IGNORECASE):
-                        results.append({"line": i + 1, "content": line.strip()})
-            
-            elif search_type == "Semantic Search (stub)":
+            if search_type == "Semantic Search (stub)":
                 st.info("Semantic search would use embeddings to find related content.")
-                # Stub implementation
-                for i, line in enumerate(xml_content.split('\n')):
-                    if query.lower() in line.lower():
-                        results.append({"line": i + 1, "content": line.strip()})
+            
+            results, highlighted_xml = _xml_scan(
+                self.document_path, os.path.getmtime(self.document_path), query, search_type
+            )
             
             # Display results
             if results:
@@ -313,43 +437,10 @@ class DocumentSearch:
                 results_df = [{"Line": r["line"], "Content": r["content"]} for r in results]
                 st.table(results_df)
                 
-                # Create a version of the XML with highlights
-                highlighted_lines = xml_content.split('\n')
-                for result in results:
-                    line_num = result["line"] - 1
-                    if 0 <= line_num < len(highlighted_lines):
-                        highlighted_lines[line_num] = highlighted_lines[line_num].replace(
-                            query, f"**{query}**")
-                
                 with st.expander("View XML with Highlights"):
-                    st.code("\n".join(highlighted_lines), language="xml")
+                    st.code(highlighted_xml, language="xml")
             else:
                 st.info(f"No matches found for '{query}'")
                 
         except Exception as e:
             st.error(f"Error searching XML: {e}")
-    
-    def _is_near_rect(self, word_rect, match_rect, threshold=20):
-        """Check if a word rectangle is near a match rectangle
-        
-        Args:
-            word_rect: Rectangle of a word (x0, y0, x1, y1)
-            match_rect: Rectangle of a match (x0, y0, x1, y1)
-            threshold: Distance threshold in points
-            
-        Returns:
-            True if the rectangles are near each other
-        """
-        # Calculate centers
-        word_center_x = (word_rect[0] + word_rect[2]) / 2
-        word_center_y = (word_rect[1] + word_rect[3]) / 2
-        match_center_x = (match_rect[0] + match_rect[2]) / 2
-        match_center_y = (match_rect[1] + match_rect[3]) / 2
-        
-        # Calculate distance
-        distance = np.sqrt(
-            (word_center_x - match_center_x) ** 2 + 
-            (word_center_y - match_center_y) ** 2
-        )
-        
-        return distance < threshold
\ No newline at end of file
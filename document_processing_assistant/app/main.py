@@ -1,6 +1,5 @@
 import os
 import streamlit as st
-import json
 import time
 from datetime import datetime
 import uuid
@@ -8,12 +7,12 @@ import uuid
 from components.document_viewer import DocumentViewer
 from components.json_editor import JsonEditor
 from components.guidelines import GuidelinesViewer
-from components.chat import DocumentChat
-from components.ocr_viewer import OcrViewer
-from components.search import DocumentSearch
 
-from utils.file_handling import load_file, save_file
-from utils.json_manager import update_json_with_provenance
+# The OCR viewer, search and chat components (and PyMuPDF behind the first
+# two) are imported where they are shown, to keep startup fast
+
+from utils.file_handling import load_file, save_file, json_dumps
+from utils.json_manager import update_json_with_provenance, append_provenance_entry
 from utils.auth_stub import get_user_identity
 
 # Page configuration
@@ -34,6 +33,8 @@ if 'user_info' not in st.session_state:
     st.session_state.user_info = {"name": "", "email": ""}
 if 'document_path' not in st.session_state:
     st.session_state.document_path = None
+if 'document_version' not in st.session_state:
+    st.session_state.document_version = None
 if 'json_path' not in st.session_state:
     st.session_state.json_path = None
 if 'ocr_path' not in st.session_state:
@@ -45,6 +46,27 @@ if 'chat_history' not in st.session_state:
 if 'session_id' not in st.session_state:
     st.session_state.session_id = str(uuid.uuid4())
 
+def _save_upload(uploaded_file, file_path):
+    """Save an uploaded file unless this session already saved the same upload
+    
+    Streamlit hands the upload back on every rerun; rewriting it each time
+    would change its mtime and invalidate every cache keyed on it.
+    
+    Args:
+        uploaded_file: Streamlit UploadedFile to save
+        file_path: Path to save the file to
+        
+    Returns:
+        The upload's identity (file_id, size), stable across reruns
+    """
+    saved_uploads = st.session_state.setdefault("_saved_uploads", {})
+    identity = (uploaded_file.file_id, uploaded_file.size)
+    if saved_uploads.get(file_path) == identity and os.path.exists(file_path):
+        return identity
+    save_file(uploaded_file, file_path)
+    saved_uploads[file_path] = identity
+    return identity
+
 def main():
     """Main application entry point"""
     st.title("Document Processing Assistant")
@@ -72,7 +94,7 @@ def main():
         
         if uploaded_document:
             document_path = os.path.join("./temp", uploaded_document.name)
-            save_file(uploaded_document, document_path)
+            st.session_state.document_version = _save_upload(uploaded_document, document_path)
             st.session_state.document_path = document_path
             st.success(f"Document loaded: {uploaded_document.name}")
         
@@ -84,7 +106,7 @@ def main():
         
         if uploaded_json:
             json_path = os.path.join("./temp", uploaded_json.name)
-            save_file(uploaded_json, json_path)
+            _save_upload(uploaded_json, json_path)
             st.session_state.json_path = json_path
             st.success(f"JSON data loaded: {uploaded_json.name}")
         
@@ -96,7 +118,7 @@ def main():
         
         if uploaded_ocr:
             ocr_path = os.path.join("./temp", uploaded_ocr.name)
-            save_file(uploaded_ocr, ocr_path)
+            _save_upload(uploaded_ocr, ocr_path)
             st.session_state.ocr_path = ocr_path
             st.success(f"OCR data loaded: {uploaded_ocr.name}")
         
@@ -108,7 +130,7 @@ def main():
         
         if uploaded_guidelines:
             guidelines_path = os.path.join("./temp", uploaded_guidelines.name)
-            save_file(uploaded_guidelines, guidelines_path)
+            _save_upload(uploaded_guidelines, guidelines_path)
             st.session_state.guidelines_path = guidelines_path
             st.success(f"Guidelines loaded: {uploaded_guidelines.name}")
             
@@ -129,18 +151,20 @@ def main():
     with col1:
         # Document viewer
         st.header("Document Viewer")
-        document_viewer = DocumentViewer(st.session_state.document_path)
+        document_viewer = DocumentViewer(st.session_state.document_path, st.session_state.document_version)
         document_viewer.render()
         
         # OCR visualization if enabled and available
         if show_ocr and st.session_state.ocr_path:
             st.header("OCR Visualization")
+            from components.ocr_viewer import OcrViewer
             ocr_viewer = OcrViewer(st.session_state.document_path, st.session_state.ocr_path)
             ocr_viewer.render()
             
         # Search tool if enabled
         if show_search:
             st.header("Document Search")
+            from components.search import DocumentSearch
             search_tool = DocumentSearch(st.session_state.document_path, st.session_state.ocr_path)
             search_tool.render()
     
@@ -166,9 +190,14 @@ def main():
                 new_filename = f"{name_without_ext}_edited_{timestamp}.json"
                 new_path = os.path.join("./temp", new_filename)
                 
-                # Save the updated JSON with provenance
-                with open(new_path, 'w') as f:
-                    json.dump(updated_data, f, indent=2)
+                # Save the updated JSON, which carries its provenance log id,
+                # and append its provenance to that log
+                if json_editor.pending_provenance and not json_editor.provenance_log_path:
+                    updated_data["_provenance"].append(json_editor.pending_provenance)
+                with open(new_path, 'wb') as f:
+                    f.write(json_dumps(updated_data, indent=True))
+                if json_editor.pending_provenance and json_editor.provenance_log_path:
+                    append_provenance_entry(json_editor.provenance_log_path, json_editor.pending_provenance)
                 
                 st.success(f"Saved edited data to {new_filename}")
                 
@@ -178,11 +207,13 @@ def main():
     # Chat window (collapsible)
     if show_chat:
         st.header("Document Chat")
+        from components.chat import DocumentChat
         chat_component = DocumentChat(
             document_path=st.session_state.document_path,
             json_path=st.session_state.json_path,
             ocr_path=st.session_state.ocr_path,
-            chat_history=st.session_state.chat_history
+            chat_history=st.session_state.chat_history,
+            owner=st.session_state.user_info.get("email") or st.session_state.session_id
         )
         st.session_state.chat_history = chat_component.render()
 
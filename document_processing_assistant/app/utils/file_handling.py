@@ -1,8 +1,49 @@
 import os
 import json
+import mmap
 import shutil
 import tempfile
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Files smaller than this are read directly; mapping them costs more than it saves
+MMAP_MIN_BYTES = 64 * 1024
+
+def json_loads(data):
+    """Parse JSON, using orjson when it is installed
+    
+    Args:
+        data: JSON document as bytes, string or a memoryview of bytes
+        
+    Returns:
+        The parsed JSON value
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+def json_dumps(obj, indent=False):
+    """Serialize a value to JSON bytes, using orjson when it is installed
+    
+    Args:
+        obj: Value to serialize
+        indent: Whether to pretty-print with two-space indentation
+        
+    Returns:
+        The UTF-8 encoded JSON document as bytes
+    """
+    if orjson is not None:
+        option = orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, indent=2 if indent else None).encode('utf-8')
+
 def load_file(file_path):
     """Load a file from disk
     
@@ -12,33 +53,58 @@ def load_file(file_path):
     Returns:
         File content as bytes or string depending on the file type
     """
-    if not os.path.exists(file_path):
-        raise FileNotFoundError(f"File not found: {file_path}")
-    
     file_extension = os.path.splitext(file_path)[1].lower()
     
-    # Binary files
-    if file_extension in ['.pdf', '.jpg', '.jpeg', '.png']:
-        with open(file_path, 'rb') as f:
-            return f.read()
-    
-    # Text files
-    else:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-            
-            # Parse JSON if it's a JSON file
-            if file_extension == '.json':
+    # A missing file is reported by open() itself, saving a separate stat call
+    try:
+        # Binary files
+        if file_extension in ['.pdf', '.jpg', '.jpeg', '.png']:
+            with open(file_path, 'rb') as f:
+                return f.read()
+        
+        # JSON files, parsed straight from a memory map of large files
+        elif file_extension == '.json':
+            with open(file_path, 'rb') as f:
                 try:
-                    return json.loads(content)
-                except json.JSONDecodeError:
+                    if os.fstat(f.fileno()).st_size < MMAP_MIN_BYTES:
+                        return json_loads(f.read())
+                    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, \
+                            memoryview(mm) as content:
+                        return json_loads(content)
+                except ValueError:
                     raise ValueError(f"Invalid JSON format in {file_path}")
-            
-            return content
+        
+        # Text files
+        else:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                return f.read()
+    except FileNotFoundError:
+        raise FileNotFoundError(f"File not found: {file_path}") from None
+
+def _has_content(file_path, data):
+    """Check whether a file already holds exactly the given bytes
+    
+    Args:
+        file_path: Path to the file to check
+        data: Bytes-like content to compare against
+        
+    Returns:
+        True if the file exists with the same size and content
+    """
+    try:
+        if os.path.getsize(file_path) != len(data):
+            return False
+        with open(file_path, 'rb') as f:
+            return f.read() == data
+    except OSError:
+        return False
 
 def save_file(file_obj, file_path):
     """Save a file to disk
     
+    A file that already holds the same content is left untouched, so its
+    modification time (and any cache keyed on it) doesn't change.
+    
     Args:
         file_obj: File object or content to save
         file_path: Path to save the file to
@@ -50,22 +116,32 @@ def save_file(file_obj, file_path):
     os.makedirs(os.path.dirname(file_path), exist_ok=True)
     
     # Handle different file types
-    if hasattr(file_obj, 'read'):
-        # Handle StreamlitUploadedFile objects
+    if hasattr(file_obj, 'getbuffer'):
+        # Handle StreamlitUploadedFile objects, which hold their content in memory
+        with file_obj.getbuffer() as data:
+            if not _has_content(file_path, data):
+                with open(file_path, 'wb') as f:
+                    f.write(data)
+    elif hasattr(file_obj, 'read'):
+        # Handle other file-like objects
         with open(file_path, 'wb') as f:
-            f.write(file_obj.read())
+            shutil.copyfileobj(file_obj, f, length=1 << 20)
     elif isinstance(file_obj, bytes):
         # Handle binary data
-        with open(file_path, 'wb') as f:
-            f.write(file_obj)
+        if not _has_content(file_path, file_obj):
+            with open(file_path, 'wb') as f:
+                f.write(file_obj)
     elif isinstance(file_obj, str):
         # Handle string content
-        with open(file_path, 'w', encoding='utf-8') as f:
-            f.write(file_obj)
+        if not _has_content(file_path, file_obj.encode('utf-8')):
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(file_obj)
     elif isinstance(file_obj, dict) or isinstance(file_obj, list):
         # Handle JSON data
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(file_obj, f, indent=2)
+        data = json_dumps(file_obj, indent=True)
+        if not _has_content(file_path, data):
+            with open(file_path, 'wb') as f:
+                f.write(data)
     else:
         raise TypeError(f"Unsupported file object type: {type(file_obj)}")
     
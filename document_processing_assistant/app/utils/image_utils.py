@@ -0,0 +1,43 @@
+import numpy as np
+from PIL import Image
+
+
+def draw_outlines(image, rects, colors=(255, 0, 0), width=2):
+    """Draw rectangle outlines on an image with a single overlay composite
+    
+    All outlines are stamped into one RGBA overlay array, which is then
+    alpha-composited onto the image once instead of drawing each rectangle
+    through PIL. Later rectangles are drawn over earlier ones.
+    
+    Args:
+        image: PIL image to draw on
+        rects: Sequence of (x0, y0, x1, y1) pixel rectangles
+        colors: One RGB or RGBA color for every outline, or a sequence with
+            a color per rectangle
+        width: Outline width in pixels
+        
+    Returns:
+        A new RGBA image with the outlines drawn
+    """
+    base = image.convert("RGBA")
+    img_width, img_height = base.size
+    overlay = np.zeros((img_height, img_width, 4), dtype=np.uint8)
+    
+    boxes = np.asarray(rects, dtype=np.float64).reshape(-1, 4)
+    bounds = [img_width, img_height, img_width, img_height]
+    boxes = np.clip(np.rint(boxes), 0, bounds).astype(np.int64)
+    
+    # Normalize the colors to one RGBA row per rectangle
+    palette = np.asarray(colors, dtype=np.uint8)
+    if palette.ndim == 1:
+        palette = np.broadcast_to(palette, (len(boxes), palette.shape[0]))
+    if palette.shape[1] == 3:
+        palette = np.hstack([palette, np.full((len(palette), 1), 255, dtype=np.uint8)])
+    
+    for (x0, y0, x1, y1), color in zip(boxes.tolist(), palette):
+        overlay[y0:y0 + width, x0:x1] = color
+        overlay[max(y0, y1 - width):y1, x0:x1] = color
+        overlay[y0:y1, x0:x0 + width] = color
+        overlay[y0:y1, max(x0, x1 - width):x1] = color
+    
+    return Image.alpha_composite(base, Image.fromarray(overlay, "RGBA"))
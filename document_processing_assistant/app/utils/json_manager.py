@@ -1,7 +1,17 @@
+import os
 import json
+import hashlib
+from collections import defaultdict
 from datetime import datetime
+from utils.file_handling import json_loads, json_dumps
 
-def update_json_with_provenance(json_data, changes, user_info, document_path, notes=""):
+# Sidecar file extension for the append-only provenance log
+PROVENANCE_LOG_SUFFIX = ".provenance.jsonl"
+
+# Key under which a document records the id of its provenance log
+PROVENANCE_LOG_ID_KEY = "_provenance_log_id"
+
+def update_json_with_provenance(json_data, changes, user_info, document_path, notes="", log_dir=None):
     """Updates JSON data with changes and adds provenance information
     
     Args:
@@ -10,6 +20,9 @@ def update_json_with_provenance(json_data, changes, user_info, document_path, no
         user_info: Dictionary with user information (name, email)
         document_path: Path to the document being reviewed
         notes: Optional notes about the changes
+        log_dir: Optional directory of the provenance logs; when given, the
+            entry is appended to the document's log instead of the data's
+            embedded "_provenance" list, and the data records the log's id
         
     Returns:
         Updated JSON data with provenance information
@@ -30,39 +43,56 @@ def update_json_with_provenance(json_data, changes, user_info, document_path, no
         "notes": notes
     }
     
-    # Add to provenance history
-    updated_data["_provenance"].append(provenance_entry)
+    # Add to provenance history, appending to the log without rewriting
+    # the embedded history when one is given
+    if log_dir is not None:
+        log_id = ensure_provenance_log_id(updated_data)
+        append_provenance_entry(get_provenance_log_path(log_dir, log_id), provenance_entry)
+    else:
+        updated_data["_provenance"].append(provenance_entry)
     
     return updated_data
 
-def get_field_history(json_data, field_name):
+def build_field_index(json_data):
+    """Index the provenance history of every field in one pass
+    
+    Args:
+        json_data: The JSON data with provenance
+        
+    Returns:
+        Dictionary mapping each field name to its list of changes
+    """
+    field_index = defaultdict(list)
+    
+    for entry in json_data.get("_provenance", []):
+        for change in entry["changes"]:
+            field_index[change["field"]].append({
+                "timestamp": entry["timestamp"],
+                "user": entry["user"],
+                "old_value": change["old_value"],
+                "new_value": change["new_value"],
+                "action": change["action"],
+                "notes": entry.get("notes", "")
+            })
+    
+    return dict(field_index)
+
+def get_field_history(json_data, field_name, field_index=None):
     """Extracts the change history for a specific field
     
     Args:
         json_data: The JSON data with provenance
         field_name: Name of the field to get history for
+        field_index: Optional index from build_field_index, to avoid
+            rescanning the provenance when looking up several fields
         
     Returns:
         List of changes for the specified field
     """
-    if "_provenance" not in json_data:
-        return []
+    if field_index is None:
+        field_index = build_field_index(json_data)
     
-    field_history = []
-    
-    for entry in json_data["_provenance"]:
-        for change in entry["changes"]:
-            if change["field"] == field_name:
-                field_history.append({
-                    "timestamp": entry["timestamp"],
-                    "user": entry["user"],
-                    "old_value": change["old_value"],
-                    "new_value": change["new_value"],
-                    "action": change["action"],
-                    "notes": entry.get("notes", "")
-                })
-    
-    return field_history
+    return list(field_index.get(field_name, []))
 
 def export_provenance_report(json_data, output_path):
     """Exports a provenance report as a separate file
@@ -85,10 +115,68 @@ def export_provenance_report(json_data, output_path):
         )
         
         # Write to file
-        with open(output_path, 'w') as f:
-            json.dump(provenance, f, indent=2)
+        with open(output_path, 'wb') as f:
+            f.write(json_dumps(provenance, indent=True))
             
         return True
     except Exception as e:
         print(f"Error exporting provenance report: {e}")
-        return False
\ No newline at end of file
+        return False
+
+def ensure_provenance_log_id(json_data):
+    """Make sure JSON data carries the id of its document's provenance log
+    
+    A document without one is given an id derived from its content, so
+    loading the same file again finds the same log; once saved, the
+    document keeps that id whatever its file is called.
+    
+    Args:
+        json_data: The JSON data, updated in place
+        
+    Returns:
+        The provenance log id
+    """
+    log_id = json_data.get(PROVENANCE_LOG_ID_KEY)
+    if not log_id:
+        # Hash a canonical form so the id doesn't depend on orjson being installed
+        canonical = json.dumps(json_data, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+        log_id = hashlib.sha1(canonical.encode('utf-8')).hexdigest()
+        json_data[PROVENANCE_LOG_ID_KEY] = log_id
+    return log_id
+
+def get_provenance_log_path(log_dir, log_id):
+    """Get the path of a document's provenance log
+    
+    Args:
+        log_dir: Directory holding the provenance logs
+        log_id: The document's provenance log id
+        
+    Returns:
+        Path to the provenance log
+    """
+    return os.path.join(log_dir, log_id + PROVENANCE_LOG_SUFFIX)
+
+def append_provenance_entry(log_path, provenance_entry):
+    """Append a single provenance entry to an append-only log
+    
+    Args:
+        log_path: Path to the provenance log (JSON Lines)
+        provenance_entry: Provenance entry to record
+    """
+    with open(log_path, 'ab') as f:
+        f.write(json_dumps(provenance_entry) + b"\n")
+
+def load_provenance_log(log_path):
+    """Load all entries from a provenance log
+    
+    Args:
+        log_path: Path to the provenance log (JSON Lines)
+        
+    Returns:
+        List of provenance entries in the order they were written
+    """
+    if not log_path or not os.path.exists(log_path):
+        return []
+    
+    with open(log_path, 'rb') as f:
+        return [json_loads(line) for line in f if line.strip()]
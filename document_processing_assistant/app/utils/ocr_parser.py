@@ -1,2 +1,79 @@
-# Placeholder for app/utils/ocr_parser.py
-# Replace this with the actual content from GitHub repository or other source
+import streamlit as st
+import numpy as np
+from collections import defaultdict
+from utils.file_handling import json_loads
+
+# Textract block types that carry text content
+TEXT_BLOCK_TYPES = frozenset(("LINE", "WORD"))
+
+# Order of the normalized Textract bounding-box fields
+BBOX_KEYS = ("Left", "Top", "Width", "Height")
+
+def parse_textract_blocks(ocr_data):
+    """Parse AWS Textract OCR data
+    
+    Args:
+        ocr_data: AWS Textract JSON data, one page of it with its own
+            "Blocks", or a bare list of blocks
+        
+    Returns:
+        List of parsed text blocks
+    """
+    if isinstance(ocr_data, list):
+        blocks = ocr_data
+    elif ocr_data and "Blocks" in ocr_data:
+        blocks = ocr_data["Blocks"]
+    else:
+        return []
+    
+    # Filter to include only LINE and WORD blocks (text content)
+    return [block for block in blocks if block.get("BlockType") in TEXT_BLOCK_TYPES]
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def load_ocr_index(path, mtime):
+    """Load OCR data and index its text blocks by page, cached across reruns
+    
+    Args:
+        path: Path to the OCR data file (Textract JSON format)
+        mtime: Modification time of the file, used to invalidate the cache
+        
+    The result is shared by every component, so callers must not modify it.
+    
+    Returns:
+        Tuple of (ocr_data, blocks_by_page, bboxes_by_page) where
+        blocks_by_page maps a 0-based page number to the list of WORD/LINE
+        blocks on that page, and bboxes_by_page maps it to an (N, 4) array
+        of those blocks' normalized (left, top, width, height) boxes
+    """
+    with open(path, 'rb') as f:
+        ocr_data = json_loads(f.read())
+    
+    blocks_by_page = defaultdict(list)
+    
+    # Handle different Textract JSON formats
+    if "Blocks" in ocr_data:
+        # Standard Textract format
+        for block in parse_textract_blocks(ocr_data):
+            blocks_by_page[block.get("Page", 1) - 1].append(block)
+    
+    elif "Pages" in ocr_data:
+        # Alternative format with pages array
+        for page_num, page_data in enumerate(ocr_data["Pages"]):
+            blocks_by_page[page_num].extend(parse_textract_blocks(page_data))
+    
+    # If we have a simple array of blocks without page info, assume it's for page 0
+    elif isinstance(ocr_data, list):
+        blocks_by_page[0] = parse_textract_blocks(ocr_data)
+    
+    # Gather each page's bounding boxes into one array up front
+    bboxes_by_page = {
+        page_num: np.fromiter(
+            (block["Geometry"]["BoundingBox"][k] for block in blocks for k in BBOX_KEYS),
+            dtype=np.float32,
+            count=len(blocks) * 4
+        ).reshape(-1, 4)
+        for page_num, blocks in blocks_by_page.items()
+    }
+    
+    return ocr_data, dict(blocks_by_page), bboxes_by_page
@@ -0,0 +1,291 @@
+import atexit
+import contextlib
+import multiprocessing
+import os
+import sys
+import threading
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# This module is what PDF search worker processes run. It must not import
+# Streamlit or the app's components, so spawning a worker stays cheap and
+# doesn't execute any Streamlit calls.
+
+# Words whose centers lie within this distance (in points) of an exact
+# match are shown as its context
+CONTEXT_RADIUS = 20
+
+# Documents a search worker keeps open, so later batches of a search (and
+# later searches) reuse them instead of reparsing the file
+WORKER_OPEN_DOCUMENTS = 2
+
+# Documents opened by this process when it is a search worker, most
+# recently used last; set up by _init_search_worker
+_worker_documents = None
+
+# The shared worker pool, created on first use and shut down at exit
+_executor = None
+_executor_lock = threading.Lock()
+
+# Serializes the __main__ swap in _worker_main_module between threads
+_spawn_lock = threading.Lock()
+
+
+def fuzzy_span(text, query, start=0):
+    """Find the next fuzzy match of a query in a text
+    
+    A fuzzy match is the query's characters appearing in order within a
+    single line, possibly with other characters in between. The scan uses
+    str.find and never backtracks, so it is linear in the text length.
+    
+    Args:
+        text: Text to search (lowercased by the caller for case-insensitivity)
+        query: Query to look for (lowercased the same way)
+        start: Offset in text to start searching from
+        
+    Returns:
+        Tuple of (start, end) offsets of the shortest leftmost match, or None
+    """
+    if not query:
+        return None
+    
+    while True:
+        first = text.find(query[0], start)
+        if first < 0:
+            return None
+        
+        line_end = text.find("\n", first)
+        if line_end < 0:
+            line_end = len(text)
+        
+        pos = first + 1
+        for char in query[1:]:
+            pos = text.find(char, pos, line_end)
+            if pos < 0:
+                break
+            pos += 1
+        else:
+            return first, pos
+        
+        # If the rest of the query is not on this line, no later start on it can match
+        start = line_end + 1
+
+
+def scan_pdf_pages(pdf_document, page_nums, query, search_type):
+    """Find the matches of a query on some pages of a PDF
+    
+    Args:
+        pdf_document: Open fitz.Document to search
+        page_nums: Page numbers (0-based) to search
+        query: Search query string
+        search_type: Type of search to perform
+        
+    Returns:
+        List of matches (page, rect, context), with rects as plain tuples
+        so the results can be sent back from a worker process
+    """
+    results = []
+    q_lower = query.lower()
+    
+    # Search based on type
+    if search_type == "Exact Match":
+        # Use PyMuPDF's search function
+        for page_num in page_nums:
+            page = pdf_document[page_num]
+            matches = page.search_for(query)
+            if matches:
+                # Extract the page's words once and compute their centers
+                words = page.get_text("words")
+                word_texts = np.array([w[4] for w in words], dtype=object)
+                word_rects = np.array([w[:4] for w in words], dtype=np.float32).reshape(-1, 4)
+                center_x = (word_rects[:, 0] + word_rects[:, 2]) * 0.5
+                center_y = (word_rects[:, 1] + word_rects[:, 3]) * 0.5
+                
+                # Extract some context around each match
+                for match in matches:
+                    # Get words near the match for context
+                    match_x = (match[0] + match[2]) * 0.5
+                    match_y = (match[1] + match[3]) * 0.5
+                    near = (center_x - match_x) ** 2 + (center_y - match_y) ** 2 < CONTEXT_RADIUS ** 2
+                    context = " ".join(word_texts[near])
+                    
+                    results.append({
+                        "page": page_num + 1,
+                        "rect": tuple(match),
+                        "context": context
+                    })
+    
+    elif search_type == "Fuzzy Match":
+        # Simple fuzzy search implementation
+        for page_num in page_nums:
+            page = pdf_document[page_num]
+            text = page.get_text()
+            text_lower = text.lower()
+            span = fuzzy_span(text_lower, q_lower)
+            
+            # Index the page's words by lowercased text, built only
+            # for pages that match (first occurrence wins)
+            word_by_lower = {}
+            if span is not None:
+                for word in page.get_text("words"):
+                    word_by_lower.setdefault(word[4].lower(), word[:4])
+            
+            while span is not None:
+                match_start, match_end = span
+                span = fuzzy_span(text_lower, q_lower, match_end)
+                
+                # Get some context around the match
+                start = max(0, match_start - 50)
+                end = min(len(text), match_end + 50)
+                context = text[start:end]
+                
+                # Find the location of the match on the page from the
+                # words it spans (this is approximate since a fuzzy
+                # match can start or end inside a word)
+                tokens = text_lower[match_start:match_end].split()
+                match_rect = next(
+                    (word_by_lower[t] for t in tokens if t in word_by_lower), None
+                )
+                if match_rect is None and tokens:
+                    hits = page.search_for(tokens[0], hit_max=1)
+                    match_rect = tuple(hits[0]) if hits else None
+                
+                results.append({
+                    "page": page_num + 1,
+                    "rect": match_rect,
+                    "context": context
+                })
+    
+    elif search_type == "Semantic Search (stub)":
+        # Stub implementation - just do a case-insensitive search
+        for page_num in page_nums:
+            page = pdf_document[page_num]
+            text = page.get_text().lower()
+            # Find position of match in text, if any
+            idx = text.find(q_lower)
+            if idx >= 0:
+                start = max(0, idx - 50)
+                end = min(len(text), idx + len(query) + 50)
+                context = text[start:end]
+                
+                results.append({
+                    "page": page_num + 1,
+                    "rect": None,  # We don't have exact coordinates
+                    "context": context
+                })
+    
+    return results
+
+
+def _init_search_worker():
+    """Set up the document cache of a PDF search worker process"""
+    global _worker_documents
+    _worker_documents = {}
+
+
+def _scan_pdf_file(path, mtime, page_nums, query, search_type):
+    """Find the matches of a query on some pages of a PDF
+    
+    Runs on a worker process, which opens each document once and keeps the
+    most recently used ones open for later batches.
+    
+    Args:
+        path: Path to the PDF file
+        mtime: Modification time of the file, used to key the open document
+        page_nums: Page numbers (0-based) to search
+        query: Search query string
+        search_type: Type of search to perform
+        
+    Returns:
+        List of matches (page, rect, context)
+    """
+    import fitz  # PyMuPDF; only needed for PDF documents
+    
+    key = (path, mtime)
+    pdf_document = _worker_documents.pop(key, None)
+    if pdf_document is None:
+        pdf_document = fitz.open(path)
+        while len(_worker_documents) >= WORKER_OPEN_DOCUMENTS:
+            _worker_documents.pop(next(iter(_worker_documents))).close()
+    _worker_documents[key] = pdf_document
+    
+    return scan_pdf_pages(pdf_document, page_nums, query, search_type)
+
+
+def get_search_executor():
+    """Get the shared process pool used to search long PDFs
+    
+    Workers are spawned rather than forked, so they don't inherit the
+    server's threads or a held FITZ_LOCK.
+    
+    Returns:
+        The ProcessPoolExecutor, created on first use
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(
+                max_workers=min(8, os.cpu_count() or 1),
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_search_worker
+            )
+            atexit.register(shutdown_search_executor)
+        return _executor
+
+
+def shutdown_search_executor():
+    """Shut down the shared process pool, if it was started
+    
+    A later search starts a new pool.
+    """
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=False)
+
+
+@contextlib.contextmanager
+def _worker_main_module():
+    """Make workers spawned in this block start from this module
+    
+    A spawned process first re-imports its parent's __main__ module, which
+    under Streamlit is the app script; its top-level Streamlit calls would
+    then run again in every worker. Pointing __main__ at this module while
+    workers are started keeps them from importing the app at all.
+    """
+    with _spawn_lock:
+        main_module = sys.modules["__main__"]
+        sys.modules["__main__"] = sys.modules[__name__]
+        try:
+            yield
+        finally:
+            sys.modules["__main__"] = main_module
+
+
+def scan_pdf_batches(path, mtime, batches, query, search_type):
+    """Find the matches of a query on batches of PDF pages, in parallel
+    
+    Args:
+        path: Path to the PDF file
+        mtime: Modification time of the file, used to key the open documents
+        batches: Sequences of page numbers (0-based), one task each
+        query: Search query string
+        search_type: Type of search to perform
+        
+    Returns:
+        List of matches (page, rect, context), in batch order
+    """
+    executor = get_search_executor()
+    
+    # The pool starts workers as tasks are submitted, so submit them all here
+    with _worker_main_module():
+        futures = [
+            executor.submit(_scan_pdf_file, path, mtime, batch, query, search_type)
+            for batch in batches
+        ]
+    
+    results = []
+    for future in futures:
+        results.extend(future.result())
+    return results
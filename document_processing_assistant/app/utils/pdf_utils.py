@@ -0,0 +1,25 @@
+import threading
+import streamlit as st
+
+# PyMuPDF is not thread-safe, so every use of a document is serialized
+# between the script threads and background workers
+FITZ_LOCK = threading.Lock()
+
+
+@st.cache_resource(max_entries=4, show_spinner=False)
+def open_pdf(path, mtime):
+    """Open a PDF once and share the document across reruns and components
+    
+    The cache owns the document, so callers must not close it and must
+    hold FITZ_LOCK while using it. Evicted documents are closed by PyMuPDF
+    once the last caller still using one drops it.
+    
+    Args:
+        path: Path to the PDF file
+        mtime: Modification time of the file, used to invalidate the cache
+        
+    Returns:
+        The opened fitz.Document
+    """
+    import fitz  # PyMuPDF; imported here since it is slow to load
+    return fitz.open(path)
@@ -0,0 +1,45 @@
+import os
+import tempfile
+import pytest
+from utils.file_handling import json_dumps
+
+# RAM-backed directory used for test temp files when it is available
+SHM_DIR = "/dev/shm"
+
+
+def pytest_configure(config):
+    """Put test temp files on tmpfs so the file fixtures never hit the disk
+    
+    tempfile and pytest's tmp_path/tmp_path_factory both pick up the new
+    temp root. Set PYTEST_NO_SHM=1 to keep the system temp directory.
+    """
+    if os.environ.get("PYTEST_NO_SHM"):
+        return
+    
+    if os.path.isdir(SHM_DIR) and os.access(SHM_DIR, os.W_OK):
+        tempfile.tempdir = SHM_DIR
+
+
+@pytest.fixture(scope="session")
+def json_fixture_factory(tmp_path_factory):
+    """Factory that writes JSON test files into one shared directory
+    
+    Returns:
+        Function taking (data, name) that writes data to name.json and
+        returns its path; a name that was already written is not rewritten
+    """
+    fixture_dir = tmp_path_factory.mktemp("json_fixtures")
+    paths = {}
+    
+    def make(data, name):
+        if name not in paths:
+            path = os.path.join(fixture_dir, f"{name}.json")
+            fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            try:
+                os.write(fd, json_dumps(data))
+            finally:
+                os.close(fd)
+            paths[name] = path
+        return paths[name]
+    
+    return make
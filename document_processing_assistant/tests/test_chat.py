@@ -0,0 +1,43 @@
+import os
+import pytest
+from app.components import chat
+from app.components.chat import DocumentChat
+
+class TestDocumentChat:
+    """Unit tests for the document chat component"""
+    
+    @pytest.fixture
+    def chat_db(self, tmp_path, monkeypatch):
+        """Point the chat store at an empty database for the test"""
+        monkeypatch.setattr(chat, "CHAT_DB_PATH", os.path.join(tmp_path, "chat.db"))
+        chat._chat_db.clear()
+        yield
+        chat._chat_db().close()
+        chat._chat_db.clear()
+    
+    @pytest.fixture
+    def session_state(self, monkeypatch):
+        """Replace Streamlit's session state with a plain dictionary"""
+        state = {}
+        monkeypatch.setattr(chat.st, "session_state", state)
+        monkeypatch.setattr(DocumentChat, "_chat_fragment", lambda self: None)
+        return state
+    
+    def test_switching_documents_does_not_carry_history(self, chat_db, session_state):
+        """Test that a document without stored messages starts with an empty chat"""
+        first = [{"role": "user", "content": "hello"}]
+        chat._save_messages("analyst", "first.pdf", first)
+        
+        history = DocumentChat("first.pdf", owner="analyst").render()
+        assert history == first
+        
+        # main.py passes the current session history to the next component
+        history = DocumentChat("second.pdf", chat_history=history, owner="analyst").render()
+        assert history == []
+    
+    def test_history_is_kept_per_owner(self, chat_db, session_state):
+        """Test that another user chatting about a same-named file starts empty"""
+        chat._save_messages("analyst", "invoice.pdf", [{"role": "user", "content": "hello"}])
+        
+        history = DocumentChat("invoice.pdf", owner="reviewer").render()
+        assert history == []
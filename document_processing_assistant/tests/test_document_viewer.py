@@ -0,0 +1,27 @@
+import os
+from app.components.document_viewer import _pretty_xml
+
+class TestPrettyXml:
+    """Unit tests for the XML pretty-printer"""
+    
+    def test_external_entities_are_not_resolved(self, tmp_path):
+        """Test that an uploaded XML file cannot pull in local files"""
+        secret_path = os.path.join(tmp_path, "secret.txt")
+        with open(secret_path, 'w', encoding='utf-8') as f:
+            f.write("top-secret")
+        
+        xml_path = os.path.join(tmp_path, "payload.xml")
+        with open(xml_path, 'w', encoding='utf-8') as f:
+            f.write(f'<!DOCTYPE doc [<!ENTITY leak SYSTEM "file://{secret_path}">]><doc>&leak;</doc>')
+        
+        pretty_xml = _pretty_xml(xml_path, os.path.getmtime(xml_path))
+        assert "top-secret" not in pretty_xml
+    
+    def test_declaration_is_kept(self, tmp_path):
+        """Test that the output starts with an XML declaration"""
+        xml_path = os.path.join(tmp_path, "plain.xml")
+        with open(xml_path, 'w', encoding='utf-8') as f:
+            f.write('<?xml version="1.0"?><doc><item>1</item></doc>')
+        
+        pretty_xml = _pretty_xml(xml_path, os.path.getmtime(xml_path))
+        assert pretty_xml.startswith('<?xml version="1.0" ?>\n<doc>')
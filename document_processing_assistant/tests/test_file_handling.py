@@ -0,0 +1,24 @@
+import io
+import os
+from utils.file_handling import save_file
+
+class TestSaveFile:
+    """Unit tests for saving files to disk"""
+    
+    def test_unchanged_upload_is_not_rewritten(self, tmp_path):
+        """Test that saving the same content again keeps the file's mtime"""
+        path = os.path.join(tmp_path, "document.pdf")
+        save_file(io.BytesIO(b"%PDF-1.4"), path)
+        os.utime(path, ns=(0, 0))
+        
+        save_file(io.BytesIO(b"%PDF-1.4"), path)
+        assert os.stat(path).st_mtime_ns == 0
+    
+    def test_changed_upload_is_rewritten(self, tmp_path):
+        """Test that saving different content of the same size replaces the file"""
+        path = os.path.join(tmp_path, "document.pdf")
+        save_file(io.BytesIO(b"%PDF-1.4"), path)
+        
+        save_file(io.BytesIO(b"%PDF-1.5"), path)
+        with open(path, 'rb') as f:
+            assert f.read() == b"%PDF-1.5"
@@ -1,38 +1,38 @@
 import pytest
 import os
-import json
-import tempfile
-from app.components.json_editor import JsonEditor
+import io
+import shutil
+import pandas as pd
+from app.components.json_editor import JsonEditor, VALUE_COLUMNS, _values_frame
+from utils import file_handling
+from utils.json_manager import append_provenance_entry, load_provenance_log, PROVENANCE_LOG_ID_KEY
+
+# Contents of the sample JSON file, built once at import
+SAMPLE_DATA = {
+    "values": [
+        {
+            "name": "test_field",
+            "value": "test_value",
+            "type": "string",
+            "rules": ["required"]
+        }
+    ],
+    "_provenance": []
+}
 
 class TestJsonEditor:
     """Unit tests for the JSON editor component"""
     
-    @pytest.fixture
-    def sample_json_path(self):
-        """Create a temporary JSON file for testing"""
-        sample_data = {
-            "values": [
-                {
-                    "name": "test_field",
-                    "value": "test_value",
-                    "type": "string",
-                    "rules": ["required"]
-                }
-            ],
-            "_provenance": []
-        }
-        
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".json") as temp_file:
-            json.dump(sample_data, temp_file)
-            temp_file_path = temp_file.name
-        
-        yield temp_file_path
+    @pytest.fixture(scope="module")
+    def sample_json_path(self, json_fixture_factory):
+        """Create a temporary JSON file for testing
         
-        # Cleanup
-        if os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
+        The file is shared by every test in the module, so tests must not
+        modify it; one that needs to should copy it to its own tmp_path.
+        """
+        return json_fixture_factory(SAMPLE_DATA, "sample")
     
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def user_info(self):
         """Sample user info for testing"""
         return {
@@ -40,15 +40,87 @@ class TestJsonEditor:
             "email": "test@example.com"
         }
     
-    def test_load_json(self, sample_json_path, user_info):
+    @pytest.fixture(scope="module")
+    def editor(self, sample_json_path, user_info):
+        """Editor for the sample file, shared by tests that only read it"""
+        return JsonEditor(sample_json_path, user_info)
+    
+    def test_load_json(self, editor):
         """Test loading JSON data"""
-        editor = JsonEditor(sample_json_path, user_info)
-        assert "values" in editor.data
-        assert "_provenance" in editor.data
+        assert editor.data.keys() >= {"values", "_provenance"}
         assert len(editor.data["values"]) == 1
         assert editor.data["values"][0]["name"] == "test_field"
     
     def test_invalid_json_path(self, user_info):
         """Test handling of invalid JSON path"""
         editor = JsonEditor("nonexistent_file.json", user_info)
-        assert editor.data == {"values": [], "_provenance": []}
\ No newline at end of file
+        assert editor.data == {"values": [], "_provenance": []}
+    
+    def test_load_json_without_orjson(self, editor, sample_json_path, user_info,
+                                      tmp_path, monkeypatch):
+        """Test that the stdlib fallback loads the same data as orjson"""
+        # Load a copy so the parse isn't served from the editor's cache
+        json_copy = shutil.copy(sample_json_path, os.path.join(tmp_path, "copy.json"))
+        monkeypatch.setattr(file_handling, "orjson", None)
+        fallback_editor = JsonEditor(json_copy, user_info)
+        assert fallback_editor.data == editor.data
+    
+    def test_cached_data_is_copied(self, sample_json_path, user_info):
+        """Test that modifying an editor's data doesn't affect later loads"""
+        first_editor = JsonEditor(sample_json_path, user_info)
+        first_editor.data["values"][0]["name"] = "changed"
+        
+        second_editor = JsonEditor(sample_json_path, user_info)
+        assert second_editor.data["values"][0]["name"] == "test_field"
+    
+    def test_load_json_from_stream(self, user_info):
+        """Test loading JSON data from an in-memory file"""
+        editor = JsonEditor(io.BytesIO(file_handling.json_dumps(SAMPLE_DATA)), user_info)
+        assert editor.data.pop(PROVENANCE_LOG_ID_KEY)
+        assert editor.data == SAMPLE_DATA
+        assert editor.json_path is None
+    
+    def test_detect_changes_with_empty_value(self, editor):
+        """Test that unchanged empty values are not reported as modified"""
+        df = _values_frame([{"name": "empty", "value": None, "type": "string", "rules": []}])
+        assert editor._detect_changes(df, df.copy()) == []
+    
+    def test_detect_changes_keeps_integer_values(self, editor):
+        """Test that adding a row doesn't turn the other old values into floats"""
+        df = _values_frame([{"name": "count", "value": 3, "type": "integer", "rules": []}])
+        added = pd.DataFrame.from_records([(1, "new", 1, "integer", "")], columns=VALUE_COLUMNS)
+        edited_df = pd.concat([df.assign(value=4), added], ignore_index=True)
+        
+        changes = editor._detect_changes(df, edited_df)
+        assert changes == [
+            {"field": "count", "old_value": 3, "new_value": 4, "action": "modified"},
+            {"field": "new", "old_value": None, "new_value": 1, "action": "added"},
+        ]
+        assert type(changes[0]["old_value"]) is int
+    
+    def test_history_follows_saved_document(self, sample_json_path, user_info, tmp_path):
+        """Test that a saved and re-uploaded document finds its edit history"""
+        json_path = shutil.copy(sample_json_path, os.path.join(tmp_path, "upload.json"))
+        editor = JsonEditor(json_path, user_info)
+        entry = {"timestamp": "2024-01-01T00:00:00", "user": user_info,
+                 "document": json_path, "changes": [], "notes": ""}
+        append_provenance_entry(editor.provenance_log_path, entry)
+        
+        # Save the data as main.py does, then upload the saved file under another name
+        saved_path = file_handling.save_file(editor.data, os.path.join(tmp_path, "upload_edited.json"))
+        reupload_path = shutil.copy(saved_path, os.path.join(tmp_path, "reupload.json"))
+        reuploaded = JsonEditor(reupload_path, user_info)
+        assert load_provenance_log(reuploaded.provenance_log_path) == [entry]
+    
+    def test_history_is_not_shared_by_file_name(self, user_info, tmp_path):
+        """Test that a different document uploaded under the same name starts a new history"""
+        json_path = os.path.join(tmp_path, "upload.json")
+        file_handling.save_file(SAMPLE_DATA, json_path)
+        editor = JsonEditor(json_path, user_info)
+        append_provenance_entry(editor.provenance_log_path, {"timestamp": "2024-01-01T00:00:00"})
+        
+        other_data = {"values": [{"name": "other_field", "value": "x"}], "_provenance": []}
+        file_handling.save_file(other_data, json_path)
+        other_editor = JsonEditor(json_path, user_info)
+        assert other_editor.provenance_log_path != editor.provenance_log_path
+        assert load_provenance_log(other_editor.provenance_log_path) == []
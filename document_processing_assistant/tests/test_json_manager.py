@@ -0,0 +1,21 @@
+from utils.json_manager import (
+    update_json_with_provenance,
+    get_provenance_log_path,
+    load_provenance_log,
+    PROVENANCE_LOG_ID_KEY
+)
+
+class TestUpdateJsonWithProvenance:
+    """Unit tests for recording provenance"""
+    
+    def test_log_is_recorded_in_data(self, tmp_path):
+        """Test that data whose provenance went to a log records the log id"""
+        json_data = {"values": [], "_provenance": []}
+        changes = [{"field": "total", "old_value": 1, "new_value": 2, "action": "modified"}]
+        
+        updated_data = update_json_with_provenance(json_data, changes, {"name": "Test User"},
+                                                   "invoice.pdf", log_dir=str(tmp_path))
+        assert updated_data["_provenance"] == []
+        
+        log_path = get_provenance_log_path(str(tmp_path), updated_data[PROVENANCE_LOG_ID_KEY])
+        assert [entry["changes"] for entry in load_provenance_log(log_path)] == [changes]
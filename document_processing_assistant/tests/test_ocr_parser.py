@@ -0,0 +1,38 @@
+import os
+import pytest
+from utils.ocr_parser import load_ocr_index, parse_textract_blocks
+
+BOX = {"BoundingBox": {"Left": 0.1, "Top": 0.2, "Width": 0.3, "Height": 0.05}}
+LINE = {"BlockType": "LINE", "Text": "Invoice 1234", "Geometry": BOX}
+WORD = {"BlockType": "WORD", "Text": "Invoice"}
+PAGE = {"BlockType": "PAGE"}
+
+class TestParseTextractBlocks:
+    """Unit tests for Textract block parsing"""
+    
+    def test_standard_format(self):
+        """Test that only LINE and WORD blocks are kept, in order"""
+        assert parse_textract_blocks({"Blocks": [PAGE, LINE, WORD]}) == [LINE, WORD]
+    
+    def test_block_list(self):
+        """Test parsing a bare list of blocks"""
+        assert parse_textract_blocks([WORD, PAGE]) == [WORD]
+    
+    def test_missing_blocks(self):
+        """Test that data without blocks yields no text blocks"""
+        assert parse_textract_blocks({"Pages": []}) == []
+        assert parse_textract_blocks(None) == []
+
+
+class TestLoadOcrIndex:
+    """Unit tests for the shared OCR loader"""
+    
+    def test_pages_format(self, json_fixture_factory):
+        """Test indexing OCR data with a pages array"""
+        path = json_fixture_factory({"Pages": [{"Blocks": [PAGE]}, {"Blocks": [LINE]}]}, "ocr_pages")
+        ocr_data, blocks_by_page, bboxes_by_page = load_ocr_index(path, os.path.getmtime(path))
+        
+        assert len(ocr_data["Pages"]) == 2
+        assert blocks_by_page == {0: [], 1: [LINE]}
+        assert bboxes_by_page[0].shape == (0, 4)
+        assert bboxes_by_page[1][0].tolist() == pytest.approx([0.1, 0.2, 0.3, 0.05])
@@ -9,6 +9,8 @@ import sys
 import json
 import shutil
 import argparse
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # Define project configuration
@@ -17,7 +19,7 @@ PROJECT_ROOT = "document_processing_assistant"
 # File structure with content (in a single file)
 FILES = {
     # Configuration files
-    "requirements.txt": """# Core dependencies
+    "requirements.txt": r'''# Core dependencies
 streamlit
 pandas==2.0.3
 pillow
@@ -25,9 +27,9 @@ pymupdf==1.22.5
 markdown==3.4.4
 pytest==7.4.0
 numpy==1.25.2
-""",
+''',
     
-    "README.md": """# Document Processing Assistant
+    "README.md": r'''# Document Processing Assistant
 
 A Streamlit-based application for Operations Analysts to efficiently review and process documents with extracted data.
 
@@ -88,9 +90,9 @@ Then navigate to http://localhost:8501 in your browser.
 - models/: Data models
 - data/: Sample data files
 - tests/: Unit tests
-""",
+''',
 
-    "Dockerfile": """FROM python:3.9-slim
+    "Dockerfile": r'''FROM python:3.9-slim
 
 WORKDIR /app
 
@@ -102,10 +104,10 @@ COPY . .
 EXPOSE 8501
 
 CMD ["streamlit", "run", "app/main.py"]
-""",
+''',
 
     # Streamlit config
-    ".streamlit/config.toml": """[ui]
+    ".streamlit/config.toml": r'''[ui]
 # Hide the "Deploy" button
 deploy = false
 
@@ -117,10 +119,10 @@ enableServerHeadless = true
 [deprecation]
 # Disable deprecation warnings
 showPyplotGlobalUse = false
-""",
+''',
 
     # Main application files
-    "app/main.py": """import os
+    "app/main.py": r'''import os
 import streamlit as st
 import json
 import time
@@ -312,14 +314,14 @@ if __name__ == "__main__":
     # Create temp directory if it doesn't exist
     os.makedirs("./temp", exist_ok=True)
     main()
-""",
+''',
 
     "app/__init__.py": "# Document Processing Assistant Application",
 
     # Components
     "app/components/__init__.py": "# UI Components",
 
-    "app/components/document_viewer.py": """import os
+    "app/components/document_viewer.py": r'''import os
 import streamlit as st
 import base64
 from PIL import Image
@@ -411,9 +413,9 @@ class DocumentViewer:
             )
         except Exception as e:
             st.error(f"Error rendering XML: {e}")
-""",
+''',
 
-    "app/components/json_editor.py": """import streamlit as st
+    "app/components/json_editor.py": r'''import streamlit as st
 import json
 import pandas as pd
 from datetime import datetime
@@ -603,9 +605,9 @@ class JsonEditor:
         else:
             st.info("No data values found. Add values using the 'Add row' button.")
             return self.data
-""",
+''',
 
-    "app/components/guidelines.py": """import streamlit as st
+    "app/components/guidelines.py": r'''import streamlit as st
 import markdown
 from utils.file_handling import load_file
 
@@ -648,9 +650,9 @@ class GuidelinesViewer:
                 
         except Exception as e:
             st.error(f"Error loading guidelines: {e}")
-""",
+''',
 
-    "app/components/chat.py": """import streamlit as st
+    "app/components/chat.py": r'''import streamlit as st
 import time
 import json
 from datetime import datetime
@@ -722,9 +724,9 @@ class DocumentChat:
                 self.chat_history.append({"role": "assistant", "content": response, "timestamp": datetime.now().isoformat()})
         
         return self.chat_history
-""",
+''',
 
-    "app/components/ocr_viewer.py": """import streamlit as st
+    "app/components/ocr_viewer.py": r'''import streamlit as st
 import json
 import base64
 import fitz  # PyMuPDF
@@ -855,9 +857,9 @@ class OcrViewer:
                 file_name=f"ocr_page_{page_num}.png",
                 mime="image/png"
             )
-""",
+''',
 
-    "app/components/search.py": """import streamlit as st
+    "app/components/search.py": r'''import streamlit as st
 import os
 import json
 import re
@@ -956,12 +958,12 @@ class DocumentSearch:
                     st.divider()
             else:
                 st.warning(f"No matches found for '{search_query}'")
-""",
+''',
 
     # Utils
     "app/utils/__init__.py": "# Utility modules",
 
-    "app/utils/file_handling.py": """import os
+    "app/utils/file_handling.py": r'''import os
 import json
 import shutil
 import tempfile
@@ -1045,9 +1047,9 @@ def get_temp_path(filename):
     """
     temp_dir = tempfile.gettempdir()
     return os.path.join(temp_dir, filename)
-""",
+''',
 
-    "app/utils/json_manager.py": """import json
+    "app/utils/json_manager.py": r'''import json
 from datetime import datetime
 
 def update_json_with_provenance(json_data, changes, user_info, document_path, notes=""):
@@ -1104,9 +1106,9 @@ def get_changes_summary(json_data):
         })
     
     return summary
-""",
+''',
 
-    "app/utils/ocr_parser.py": """import json
+    "app/utils/ocr_parser.py": r'''import json
 
 def parse_textract_blocks(ocr_data):
     """Parse AWS Textract OCR data
@@ -1154,9 +1156,9 @@ def get_text_coordinates(ocr_data, text, exact_match=False):
                 })
     
     return matches
-""",
+''',
 
-    "app/utils/auth_stub.py": """# Placeholder for app/utils/auth_stub.py
+    "app/utils/auth_stub.py": r'''# Placeholder for app/utils/auth_stub.py
 # Simplified authentication stub for development purposes
 
 def get_user_identity():
@@ -1172,12 +1174,12 @@ def get_user_identity():
         "email": "test@example.com",
         "role": "reviewer"
     }
-""",
+''',
 
     # Models
     "app/models/__init__.py": "# Data models",
 
-    "app/models/document.py": """class Document:
+    "app/models/document.py": r'''class Document:
     """Document model representing a document being processed"""
     
     def __init__(self, path, document_type=None, metadata=None):
@@ -1221,9 +1223,9 @@ def get_user_identity():
             document_type=data.get("type"),
             metadata=data.get("metadata", {})
         )
-""",
+''',
 
-    "app/models/extraction.py": """import json
+    "app/models/extraction.py": r'''import json
 from datetime import datetime
 
 class ExtractionValue:
@@ -1320,9 +1322,9 @@ class Extraction:
         """Create from JSON string"""
         data = json.loads(json_string)
         return cls.from_dict(data)
-""",
+''',
 
-    "app/models/audit.py": """from datetime import datetime
+    "app/models/audit.py": r'''from datetime import datetime
 
 class AuditEntry:
     """Represents an audit entry for tracking changes"""
@@ -1410,12 +1412,12 @@ class AuditTrail:
         """Create from dictionary"""
         entries = [AuditEntry.from_dict(e) for e in data.get("entries", [])]
         return cls(entries=entries)
-""",
+''',
 
     # Tests
     "tests/__init__.py": "# Test package",
 
-    "tests/test_json_editor.py": """import unittest
+    "tests/test_json_editor.py": r'''import unittest
 import json
 import os
 import tempfile
@@ -1488,10 +1490,10 @@ class TestJsonEditor(unittest.TestCase):
 
 if __name__ == '__main__':
     unittest.main()
-""",
+''',
 
     # Sample data
-    "data/sample_documents/invoice_2023_1234.xml": """<?xml version="1.0" encoding="UTF-8"?>
+    "data/sample_documents/invoice_2023_1234.xml": r'''<?xml version="1.0" encoding="UTF-8"?>
 <invoice>
     <invoice_number>INV-2023-1234</invoice_number>
     <date>2023-09-15</date>
@@ -1521,9 +1523,9 @@ if __name__ == '__main__':
     <payment_terms>Net 30</payment_terms>
     <currency>USD</currency>
 </invoice>
-""",
+''',
 
-    "data/sample_extractions/invoice_extraction.json": """{
+    "data/sample_extractions/invoice_extraction.json": r'''{
   "values": [
     {
       "name": "invoice_number",
@@ -1594,9 +1596,9 @@ if __name__ == '__main__':
   ],
   "_provenance": []
 }
-""",
+''',
 
-    "data/sample_ocr/invoice_2023_1234_ocr.json": """{
+    "data/sample_ocr/invoice_2023_1234_ocr.json": r'''{
   "Blocks": [
     {
       "BlockType": "PAGE",
@@ -1654,9 +1656,9 @@ if __name__ == '__main__':
     }
   ]
 }
-""",
+''',
 
-    "data/guidelines/invoice_review_guidelines.md": """# Invoice Review Guidelines
+    "data/guidelines/invoice_review_guidelines.md": r'''# Invoice Review Guidelines
 
 ## Purpose
 This document provides guidelines for reviewing and validating toy invoice data extractions.
@@ -1697,17 +1699,55 @@ When reviewing OCR data:
 * For invoices with multiple currencies, convert all to a single currency
 * For invoices with multiple tax rates, verify each line item
 * For credit notes, verify that amounts are properly marked as negative
-"""
+'''
 }
 
+# File contents, encoded once up front, and their hashes
+FILES_BYTES = {file_path: content.encode('utf-8') for file_path, content in FILES.items()}
+FILES_SHA1 = {file_path: hashlib.sha1(data).hexdigest() for file_path, data in FILES_BYTES.items()}
+
+# Records the hash of every installed file, so updates can skip unchanged ones
+MANIFEST_FILE = ".install_manifest.json"
+
+def _write_file(path, data):
+    """Write bytes to a file without a buffered file object
+    
+    Args:
+        path: Path of the file to create or overwrite
+        data: Bytes to write
+        
+    Returns:
+        The path that was written
+    """
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+    return path
+
 # Function to create the project structure
-def create_project_structure():
-    """Create the project structure and files"""
+def create_project_structure(update=False):
+    """Create the project structure and files
+    
+    Args:
+        update: Whether to update an existing installation in place, only
+            writing the files whose content changed since it was installed
+    """
     root_dir = PROJECT_ROOT
     print(f"Creating project structure in {root_dir}")
     
+    # Hashes of the files as last installed, when updating in place
+    manifest_path = os.path.join(root_dir, MANIFEST_FILE)
+    installed = {}
+    
     # Create root directory
-    if os.path.exists(root_dir):
+    if update and os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            installed = json.load(f)
+    elif os.path.exists(root_dir):
         choice = input(f"Directory {root_dir} already exists. Overwrite? (y/n): ")
         if choice.lower() != 'y':
             print("Installation cancelled.")
@@ -1733,33 +1773,48 @@ def create_project_structure():
         ".streamlit"  # Streamlit config folder
     ]
     
-    for directory in directories:
-        dir_path = os.path.join(root_dir, directory)
+    # Add the parent of every file, then create each distinct directory once;
+    # sorting puts parents before their children
+    dir_paths = {os.path.normpath(os.path.join(root_dir, directory)) for directory in directories}
+    dir_paths.update(
+        os.path.dirname(os.path.normpath(os.path.join(root_dir, file_path))) for file_path in FILES
+    )
+    
+    for dir_path in sorted(dir_paths):
         os.makedirs(dir_path, exist_ok=True)
         print(f"Created directory: {dir_path}")
     
-    # Create files
-    for file_path, content in FILES.items():
-        full_path = os.path.join(root_dir, file_path)
-        
-        # Ensure the directory exists
-        os.makedirs(os.path.dirname(full_path), exist_ok=True)
-        
-        # Write the file
-        with open(full_path, 'w', encoding='utf-8') as f:
-            f.write(content)
-        
-        print(f"Created file: {full_path}")
+    # Skip files that are unchanged since the last install
+    changed = [
+        file_path for file_path in FILES_BYTES
+        if installed.get(file_path) != FILES_SHA1[file_path]
+        or not os.path.exists(os.path.join(root_dir, file_path))
+    ]
+    if len(changed) < len(FILES_BYTES):
+        print(f"Skipping {len(FILES_BYTES) - len(changed)} unchanged files")
+    
+    # Create files; the writes are independent, so they overlap on a thread pool
+    full_paths = [os.path.join(root_dir, file_path) for file_path in changed]
+    with ThreadPoolExecutor(max_workers=min(16, len(full_paths) or 1)) as executor:
+        for full_path in executor.map(_write_file, full_paths,
+                                      [FILES_BYTES[file_path] for file_path in changed]):
+            print(f"Created file: {full_path}")
+    
+    # Record what was installed for the next update
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(FILES_SHA1, f, indent=2)
     
     return True
 
 def main():
     """Main installation function"""
     parser = argparse.ArgumentParser(description="Install Document Processing Assistant")
+    parser.add_argument("--update", action="store_true",
+                        help="Update an existing installation, rewriting only changed files")
     args = parser.parse_args()
     
     # Create project structure and files
-    if create_project_structure():
+    if create_project_structure(update=args.update):
         print("\nInstallation completed successfully!")
         print("\nNext steps:")
         print(f"1. Install requirements: pip install -r {PROJECT_ROOT}/requirements.txt")
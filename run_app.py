@@ -7,33 +7,37 @@ Starts the Streamlit application and can run tests.
 import os
 import sys
 import subprocess
-import platform
 import argparse
-from pathlib import Path
 
-# Get the directory where this script is located
-SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Project and virtual environment paths are shared with the setup script
+from setup_env import PROJECT_ROOT, VENV_DIR, VENV_PYTHON, IS_WINDOWS, get_venv_python
 
-# Project configuration
-PROJECT_ROOT = os.path.join(SCRIPT_DIR, "document_processing_assistant")
-VENV_NAME = "doc_processing_env"
+# Modules the app imports at startup; importing them before Streamlit starts
+# means the first page load doesn't wait for them
+PREWARM_MODULES = ("numpy", "pandas", "PIL.Image", "lxml.etree")
 
-def get_venv_python():
-    """Get the path to the Python executable in the virtual environment"""
-    if platform.system() == "Windows":
-        return os.path.join(PROJECT_ROOT, VENV_NAME, "Scripts", "python")
-    else:
-        return os.path.join(PROJECT_ROOT, VENV_NAME, "bin", "python")
-
-def get_venv_streamlit():
-    """Get the path to the Streamlit executable in the virtual environment"""
-    if platform.system() == "Windows":
-        return os.path.join(PROJECT_ROOT, VENV_NAME, "Scripts", "streamlit")
-    else:
-        return os.path.join(PROJECT_ROOT, VENV_NAME, "bin", "streamlit")
+def get_streamlit_command(app_path):
+    """Get the command that starts Streamlit with the app's heavy imports done
+    
+    Streamlit runs the app script in the server process, so modules imported
+    before the server starts are already loaded for the first session. The
+    command runs Streamlit's CLI through the venv Python directly rather than
+    through the streamlit wrapper script.
+    """
+    preamble = "".join(f"import {module}; " for module in PREWARM_MODULES)
+    return [
+        VENV_PYTHON, "-c",
+        f"{preamble}import sys; from streamlit.web import cli; "
+        f"sys.argv = ['streamlit', 'run', {app_path!r}]; sys.exit(cli.main())"
+    ]
 
 def check_environment():
     """Check if the environment is set up correctly"""
+    # The venv lives inside the project directory, so finding its Python
+    # answers both checks with one stat on the common path
+    if os.path.exists(VENV_PYTHON):
+        return True
+    
     if not os.path.exists(PROJECT_ROOT):
         print(f"Error: Project directory '{PROJECT_ROOT}' not found.")
         
@@ -49,27 +53,36 @@ def check_environment():
         print("Please run setup_env.py first to create the project structure.")
         return False
     
-    venv_python = get_venv_python()
-    if not os.path.exists(venv_python):
-        print(f"Error: Virtual environment not found at {os.path.join(PROJECT_ROOT, VENV_NAME)}")
-        print("Please run setup_env.py first.")
-        return False
-    
-    return True
+    print(f"Error: Virtual environment not found at {VENV_DIR}")
+    print("Please run setup_env.py first.")
+    return False
 
 def run_streamlit_app():
     """Run the Streamlit application"""
     print("Starting Streamlit application...")
     
     app_path = os.path.join(PROJECT_ROOT, "app", "main.py")
-    streamlit_path = get_venv_streamlit()
     
     if not os.path.exists(app_path):
         print(f"Error: Application file not found at {app_path}")
         return False
     
+    command = get_streamlit_command(app_path)
+    
+    # Replace this process with Streamlit rather than waiting on it as a
+    # child; Windows has no real exec, so it keeps using a subprocess there
+    if not IS_WINDOWS:
+        sys.stdout.flush()
+        try:
+            os.execv(command[0], command)
+        except OSError as e:
+            print(f"Error running Streamlit application: {e}")
+            return False
+    
     try:
-        subprocess.run([streamlit_path, "run", app_path], check=True)
+        # close_fds=False lets subprocess use posix_spawn instead of fork;
+        # this script holds no descriptors worth hiding from the child
+        subprocess.run(command, check=True, close_fds=False)
         return True
     except subprocess.CalledProcessError as e:
         print(f"Error running Streamlit application: {e}")
@@ -90,7 +103,7 @@ def run_tests():
         return False
     
     try:
-        subprocess.run([venv_python, "-m", "pytest", tests_dir, "-v"], check=True)
+        subprocess.run([venv_python, "-m", "pytest", tests_dir, "-q", "--tb=short"], check=True, close_fds=False)
         print("All tests passed!")
         return True
     except subprocess.CalledProcessError as e:
@@ -5,10 +5,11 @@ Creates a virtual environment and installs dependencies.
 """
 
 import os
+import hashlib
+import shutil
 import subprocess
 import sys
 import platform
-from pathlib import Path
 
 # Get the directory where this script is located
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -17,6 +18,24 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.join(SCRIPT_DIR, "document_processing_assistant")
 VENV_NAME = "doc_processing_env"
 
+# Virtual environment paths for this platform, worked out once at import
+IS_WINDOWS = platform.system() == "Windows"
+VENV_DIR = os.path.join(PROJECT_ROOT, VENV_NAME)
+VENV_BIN_DIR = os.path.join(VENV_DIR, "Scripts" if IS_WINDOWS else "bin")
+VENV_PYTHON = os.path.join(VENV_BIN_DIR, "python")
+if IS_WINDOWS:
+    VENV_ACTIVATE_COMMAND = os.path.join(VENV_BIN_DIR, "activate")
+else:
+    VENV_ACTIVATE_COMMAND = f"source {os.path.join(VENV_BIN_DIR, 'activate')}"
+
+# Optional directory of prebuilt wheels (e.g. from 'pip download -r
+# requirements.txt -d wheelhouse'), preferred over the network when present
+WHEELHOUSE_DIR = os.path.join(PROJECT_ROOT, "wheelhouse")
+
+# Digest of the requirements last installed into the venv, so unchanged
+# requirements skip pip entirely
+REQUIREMENTS_STAMP = os.path.join(VENV_DIR, ".requirements.sha1")
+
 def check_python_version():
     """Check if Python version is compatible"""
     required_version = (3, 7)
@@ -28,12 +47,29 @@ def check_python_version():
         sys.exit(1)
 
 def create_virtual_environment():
-    """Create a virtual environment"""
+    """Create a virtual environment
+    
+    Uses uv when it is installed, which seeds pip from its wheel cache
+    instead of unpacking the bundled ensurepip wheels; falls back to the
+    standard library venv module otherwise.
+    """
+    if os.path.exists(VENV_PYTHON):
+        print(f"Virtual environment already exists: {VENV_NAME}")
+        return
+    
     print(f"Creating virtual environment: {VENV_NAME}")
     
+    venv_path = VENV_DIR
+    uv_path = shutil.which("uv")
+    if uv_path:
+        command = [uv_path, "venv", "--seed", "--python", sys.executable, venv_path]
+    else:
+        command = [sys.executable, "-m", "venv", venv_path]
+    
     try:
-        subprocess.run([sys.executable, "-m", "venv", os.path.join(PROJECT_ROOT, VENV_NAME)], 
-                      check=True)
+        # close_fds=False lets subprocess use posix_spawn instead of fork;
+        # this script holds no descriptors worth hiding from the child
+        subprocess.run(command, check=True, close_fds=False)
         print("Virtual environment created successfully!")
     except subprocess.CalledProcessError as e:
         print(f"Error creating virtual environment: {e}")
@@ -41,20 +77,22 @@ def create_virtual_environment():
 
 def get_venv_activate_command():
     """Get the appropriate activate command for the current platform"""
-    if platform.system() == "Windows":
-        return os.path.join(PROJECT_ROOT, VENV_NAME, "Scripts", "activate")
-    else:
-        return f"source {os.path.join(PROJECT_ROOT, VENV_NAME, 'bin', 'activate')}"
+    return VENV_ACTIVATE_COMMAND
 
 def get_venv_python():
     """Get the path to the Python executable in the virtual environment"""
-    if platform.system() == "Windows":
-        return os.path.join(PROJECT_ROOT, VENV_NAME, "Scripts", "python")
-    else:
-        return os.path.join(PROJECT_ROOT, VENV_NAME, "bin", "python")
+    return VENV_PYTHON
+
+def get_requirements_digest(requirements_path):
+    """Get a digest of the requirements and the Python version they are for"""
+    with open(requirements_path, "rb") as f:
+        return hashlib.sha1(f.read() + sys.version.encode()).hexdigest()
 
 def install_dependencies():
-    """Install dependencies in the virtual environment"""
+    """Install dependencies in the virtual environment
+    
+    Uses uv when it is installed, falling back to the environment's pip.
+    """
     print("Installing dependencies...")
     
     requirements_path = os.path.join(PROJECT_ROOT, "requirements.txt")
@@ -64,11 +102,34 @@ def install_dependencies():
         print(f"Error: Requirements file not found at {requirements_path}")
         sys.exit(1)
     
+    # Skip pip when these requirements were already installed
+    digest = get_requirements_digest(requirements_path)
+    if os.path.exists(REQUIREMENTS_STAMP):
+        with open(REQUIREMENTS_STAMP) as f:
+            if f.read().strip() == digest:
+                print("Dependencies are already up to date.")
+                return
+    
+    uv_path = shutil.which("uv")
+    if uv_path:
+        # uv resolves and downloads the requirements in parallel
+        commands = [[uv_path, "pip", "install", "--python", venv_python, "-r", requirements_path]]
+    else:
+        # Upgrade pip on its own, so --upgrade doesn't also upgrade the
+        # unpinned requirements; modules are compiled to bytecode on first
+        # import instead of all up front
+        pip_install = [venv_python, "-m", "pip", "install", "--no-input",
+                       "--disable-pip-version-check", "--no-compile"]
+        commands = [pip_install + ["--upgrade", "pip"], pip_install + ["-r", requirements_path]]
+    
+    if os.path.isdir(WHEELHOUSE_DIR):
+        commands[-1] += ["--find-links", WHEELHOUSE_DIR]
+    
     try:
-        subprocess.run([venv_python, "-m", "pip", "install", "--upgrade", "pip"], 
-                     check=True)
-        subprocess.run([venv_python, "-m", "pip", "install", "-r", requirements_path], 
-                     check=True)
+        for command in commands:
+            subprocess.run(command, check=True, close_fds=False)
+        with open(REQUIREMENTS_STAMP, "w") as f:
+            f.write(digest)
         print("Dependencies installed successfully!")
     except subprocess.CalledProcessError as e:
         print(f"Error installing dependencies: {e}")
@@ -111,10 +172,7 @@ def main():
     activate_cmd = get_venv_activate_command()
     print("\nSetup completed successfully!")
     print("\nTo activate the virtual environment, run:")
-    if platform.system() == "Windows":
-        print(f"{activate_cmd}")
-    else:
-        print(f"{activate_cmd}")
+    print(activate_cmd)
     
     print("\nNext steps:")
     print("1. Activate the virtual environment using the command above")